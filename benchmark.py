@@ -0,0 +1,126 @@
+import argparse
+import io
+import random
+import sys
+import tempfile
+import time
+from datetime import date
+from pathlib import Path
+
+from reportlab.lib.units import mm
+
+from main import (
+    DEFAULT_INSTRUMENT_PROFILE,
+    NOTE_MASK_PADDING_MM,
+    NOTE_RADIUS,
+    PDF_BACKENDS,
+    ZITHER_STRINGS,
+    compute_voice_layout,
+    get_instrument_layout,
+    np,
+    render_pdf,
+    save_project_data,
+)
+from songbook import render_songbook
+
+
+def _best_time(function, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def bench_layout(note_counts, repeat, instrument=DEFAULT_INSTRUMENT_PROFILE):
+    if np is None:
+        print("numpy is not installed; only the scalar layout path is available.")
+        return
+    layout = get_instrument_layout(instrument)
+    endpoint_gap = NOTE_RADIUS + (NOTE_MASK_PADDING_MM * mm)
+    rng = random.Random(0)
+    print(f"{'notes':>8} {'scalar ms':>10} {'numpy ms':>10} {'speedup':>8}")
+    for note_count in note_counts:
+        string_numbers = [rng.randint(1, layout["string_count"]) for _ in range(note_count)]
+        arguments = (string_numbers, layout["base_left_x"], layout["right_x"], layout["string_y"], endpoint_gap)
+        scalar = _best_time(lambda: compute_voice_layout(*arguments, vectorized=False), repeat)
+        vectorized = _best_time(lambda: compute_voice_layout(*arguments, vectorized=True), repeat)
+        print(f"{note_count:>8} {scalar * 1000:>10.2f} {vectorized * 1000:>10.2f} {scalar / vectorized:>7.1f}x")
+
+
+def _random_voice(rng, note_count):
+    notes = list(ZITHER_STRINGS.keys())
+    events = []
+    for _ in range(note_count):
+        if rng.random() < 0.1:
+            events.append(("chord", rng.randint(1, 6)))
+        events.append((rng.choice(notes), rng.choice(["half", "quarter", "eighth"])))
+    return events
+
+
+def bench_backends(note_counts, repeat):
+    rng = random.Random(0)
+    print(f"{'notes':>8} " + " ".join(f"{backend + ' ms':>14}" for backend in PDF_BACKENDS) + f" {'speedup':>8}")
+    for note_count in note_counts:
+        voices = {"1": _random_voice(rng, note_count), "2": _random_voice(rng, note_count // 2)}
+        timings = []
+        for backend in PDF_BACKENDS:
+            timings.append(
+                _best_time(lambda: render_pdf(voices, "Benchmark", "3/4", io.BytesIO(), backend=backend), repeat)
+            )
+        columns = " ".join(f"{timing * 1000:>14.1f}" for timing in timings)
+        print(f"{note_count:>8} {columns} {timings[0] / timings[-1]:>7.1f}x")
+
+
+def bench_songbook(page_count, worker_counts, notes_per_page):
+    rng = random.Random(0)
+    with tempfile.TemporaryDirectory() as temp_dir:
+        temp_path = Path(temp_dir)
+        project_paths = []
+        for index in range(page_count):
+            project_path = temp_path / f"{index:04d}.json"
+            voices = {"1": _random_voice(rng, notes_per_page), "2": _random_voice(rng, notes_per_page // 2)}
+            save_project_data(voices, f"Piece {index}", "3/4", project_path)
+            project_paths.append(project_path)
+
+        print(f"{'workers':>8} {'seconds':>8} {'speedup':>8}")
+        baseline = None
+        for workers in worker_counts:
+            output_pdf = temp_path / f"songbook_{workers}.pdf"
+            start = time.perf_counter()
+            render_songbook(project_paths, output_pdf, workers, date(2000, 1, 1))
+            elapsed = time.perf_counter() - start
+            baseline = baseline or elapsed
+            print(f"{workers:>8} {elapsed:>8.2f} {baseline / elapsed:>7.1f}x")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Micro benchmarks for the zither sheet renderer.")
+    subparsers = parser.add_subparsers(dest="benchmark", required=True)
+
+    layout_parser = subparsers.add_parser("layout", help="scalar vs. numpy note layout")
+    layout_parser.add_argument("--notes", type=int, nargs="+", default=[10_000, 100_000])
+    layout_parser.add_argument("--repeat", type=int, default=5)
+
+    backend_parser = subparsers.add_parser("backend", help="reportlab vs. direct PDF writer")
+    backend_parser.add_argument("--notes", type=int, nargs="+", default=[1_000, 10_000])
+    backend_parser.add_argument("--repeat", type=int, default=3)
+
+    songbook_parser = subparsers.add_parser("songbook", help="songbook rendering with 1..N worker processes")
+    songbook_parser.add_argument("--pages", type=int, default=500)
+    songbook_parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    songbook_parser.add_argument("--notes-per-page", type=int, default=80)
+
+    args = parser.parse_args(argv)
+    if args.benchmark == "layout":
+        bench_layout(args.notes, args.repeat)
+    elif args.benchmark == "backend":
+        bench_backends(args.notes, args.repeat)
+    elif args.benchmark == "songbook":
+        bench_songbook(args.pages, args.workers, args.notes_per_page)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,561 @@
+import argparse
+import contextlib
+import re
+import sys
+import xml.etree.ElementTree as ET
+import zipfile
+from fractions import Fraction
+from pathlib import Path
+
+from main import (
+    CHROMATIC_STEPS,
+    DEFAULT_INSTRUMENT_PROFILE,
+    _serialize_chord_spec,
+    get_instrument_layout,
+    save_project_data,
+)
+
+# ---- Konfiguration ----
+
+# Chord symbol root -> chord bar number on the zither. Chord symbols with other roots are reported.
+DEFAULT_CHORD_NUMBERS = {"C": 1, "G": 2, "F": 3, "D": 4, "A": 5, "E": 6}
+
+DURATION_BY_LENGTH = {
+    Fraction(1, 1): "whole",
+    Fraction(1, 2): "half",
+    Fraction(1, 4): "quarter",
+    Fraction(1, 8): "eighth",
+    Fraction(1, 16): "sixteenth",
+}
+MUSICXML_DURATION_TYPES = {"whole": "whole", "half": "half", "quarter": "quarter", "eighth": "eighth", "16th": "sixteenth"}
+
+NOTE_LETTER_SEMITONES = {"c": 0, "d": 2, "e": 4, "f": 5, "g": 7, "a": 9, "b": 11}
+SHARP_ORDER = "fcgdaeb"
+FLAT_ORDER = "beadgcf"
+MAJOR_KEY_SHARPS = {"c": 0, "g": 1, "d": 2, "a": 3, "e": 4, "b": 5, "f": -1}
+MODE_SHARP_OFFSETS = {"": 0, "maj": 0, "ion": 0, "m": -3, "min": -3, "aeo": -3, "mix": -1, "dor": -2, "phr": -4, "lyd": 1, "loc": -5}
+# Zither string "c1" is middle C (C4 in scientific pitch notation).
+ZITHER_OCTAVE_OFFSET = 3
+
+ABC_TOKEN_RE = re.compile(
+    r"""
+    (?P<chord_symbol>"[^"]*")
+    | (?P<decoration>![^!]*!|\+[^+\s]*\+)
+    | (?P<inline_field>\[[A-Za-z]:[^\]]*\])
+    | (?P<grace>\{[^}]*\})
+    | (?P<tuplet>\(\d(?::\d?){0,2})
+    | (?P<note_group>\[(?:[_=^]*[A-Ga-g][,']*[\d/]*)+\][\d/]*)
+    | (?P<note>[_=^]*[A-Ga-g][,']*[\d/]*)
+    | (?P<rest>[zx][\d/]*)
+    | (?P<multi_rest>[ZX]\d*)
+    | (?P<bar>:*\|+[\]:]*\d*|:*\[\||\[\d|::)
+    | (?P<broken>[<>]+)
+    | (?P<tie>-)
+    | (?P<skip>[()\s`.~HLMOPSTuv\\])
+    """,
+    re.VERBOSE,
+)
+# Letters of ABC 2.1 information fields; a line starting with one of them and ":" is never music.
+ABC_FIELD_LETTERS = "ABCDFGHIKLMmNOPQRrSsTUVWwXZ"
+ABC_FIELD_RE = re.compile(rf"([{ABC_FIELD_LETTERS}]):(.*)")
+# Fields that would change how the music is read but are not interpreted by this importer.
+ABC_UNSUPPORTED_FIELDS = {"I": "Instruction", "U": "User-defined symbol", "m": "Macro"}
+ABC_PITCH_RE = re.compile(r"(?P<accidental>[_=^]*)(?P<letter>[A-Ga-g])(?P<octave>[,']*)(?P<length>[\d/]*)")
+
+
+def _slugify(text):
+    slug = re.sub(r"[^A-Za-z0-9]+", "_", text).strip("_").lower()
+    return slug or "untitled"
+
+
+def _pitch_name(semitone, octave):
+    octave += semitone // 12
+    return f"{CHROMATIC_STEPS[semitone % 12]}{octave}"
+
+
+def _duration_for_length(length):
+    if length in DURATION_BY_LENGTH:
+        return DURATION_BY_LENGTH[length], False
+    base_length = length * Fraction(2, 3)
+    if base_length in DURATION_BY_LENGTH:
+        return DURATION_BY_LENGTH[base_length], True
+    return None, False
+
+
+def _chord_number(symbol, chord_numbers):
+    match = re.match(r"([A-Ga-g][#b]?)(.*)", symbol.strip())
+    if not match:
+        return None
+    root, quality = match.group(1), match.group(2)
+    # Chord bars only provide major and dominant seventh chords.
+    if quality not in {"", "7"}:
+        return None
+    return chord_numbers.get(root[0].upper() + root[1:])
+
+
+def build_events(items, zither_strings, chord_numbers, issues):
+    # items: (kind, voice_id, pitch_name or None, length, chord_symbol or None)
+    voices = {}
+    for kind, voice_id, pitch_name, length, chord_symbol in items:
+        events = voices.setdefault(voice_id, [])
+        chord_spec = None
+        if chord_symbol is not None:
+            chord_number = _chord_number(chord_symbol, chord_numbers)
+            if chord_number is None:
+                issues.append(f"Voice {voice_id}: chord symbol {chord_symbol!r} has no chord bar and was skipped.")
+            else:
+                chord_spec = _serialize_chord_spec(chord_number, 4)
+
+        duration, dotted = _duration_for_length(length)
+        if duration is None:
+            issues.append(f"Voice {voice_id}: length {length} of {pitch_name or 'rest'} is not supported and was skipped.")
+            if chord_spec is not None:
+                events.append(("chord", chord_spec))
+            continue
+
+        if kind == "rest":
+            if dotted:
+                issues.append(f"Voice {voice_id}: dotted {duration} rest was stored without its dot.")
+            events.append(("rest", duration))
+            if chord_spec is not None:
+                events.append(("chord", chord_spec))
+            continue
+
+        if pitch_name not in zither_strings:
+            issues.append(f"Voice {voice_id}: note {pitch_name} is outside the zither range.")
+        if dotted:
+            events.append((pitch_name, duration, True, chord_spec))
+        elif chord_spec is not None:
+            events.append((pitch_name, duration, chord_spec))
+        else:
+            events.append((pitch_name, duration))
+    return voices
+
+
+# ---- ABC ----
+
+
+def iter_abc_tunes(source_path):
+    # Yields the lines of one tune at a time so that only a single tune is held in memory. Fields of the
+    # file header (everything before the first blank line, if it comes before the first X:) are put in
+    # front of every tune; T: is left out because it names a single tune.
+    file_header = []
+    in_file_header = True
+    tune_lines = []
+    with open(source_path, encoding="utf-8", errors="replace") as handle:
+        for raw_line in handle:
+            line = raw_line.rstrip("\r\n")
+            if line.startswith("X:"):
+                in_file_header = False
+                if tune_lines:
+                    yield file_header + tune_lines
+                tune_lines = [line]
+            elif not line.strip():
+                in_file_header = False
+                if tune_lines:
+                    yield file_header + tune_lines
+                tune_lines = []
+            elif tune_lines:
+                tune_lines.append(line)
+            elif in_file_header:
+                field_match = ABC_FIELD_RE.match(line)
+                if field_match and field_match.group(1) != "T":
+                    file_header.append(line)
+    if tune_lines:
+        yield file_header + tune_lines
+
+
+def _abc_key_accidentals(key_text, issues):
+    key_text = key_text.strip()
+    match = re.match(r"([A-G])([#b]?)\s*([A-Za-z]*)", key_text)
+    if not match:
+        if key_text:
+            issues.append(f"Key {key_text!r} is not supported; using C major.")
+        return {}
+    tonic, tonic_accidental, mode_text = match.groups()
+    mode = "m" if mode_text.lower() == "m" else mode_text.lower()[:3]
+    if mode not in MODE_SHARP_OFFSETS:
+        issues.append(f"Key mode {mode_text!r} is not supported; using major.")
+        mode = ""
+    sharps = MAJOR_KEY_SHARPS[tonic.lower()] + MODE_SHARP_OFFSETS[mode]
+    sharps += {"#": 7, "b": -7}.get(tonic_accidental, 0)
+    if not -7 <= sharps <= 7:
+        issues.append(f"Key {key_text!r} is not supported; using C major.")
+        return {}
+    if sharps >= 0:
+        return {letter: 1 for letter in SHARP_ORDER[:sharps]}
+    return {letter: -1 for letter in FLAT_ORDER[:-sharps]}
+
+
+def _abc_length_multiplier(length_text):
+    if not length_text:
+        return Fraction(1)
+    if "/" not in length_text:
+        return Fraction(int(length_text))
+    numerator_text, _, denominator_text = length_text.partition("/")
+    numerator = int(numerator_text) if numerator_text else 1
+    if denominator_text.startswith("/") or not denominator_text:
+        # "/" halves and "//" quarters the default length.
+        return Fraction(numerator, 2 ** length_text.count("/"))
+    return Fraction(numerator, int(denominator_text))
+
+
+def _abc_pitch(match, key_accidentals, bar_accidentals):
+    letter = match.group("letter")
+    accidental_text = match.group("accidental")
+    base_letter = letter.lower()
+    octave = 1 if letter.isupper() else 2
+    octave += match.group("octave").count("'") - match.group("octave").count(",")
+    if accidental_text:
+        accidental = accidental_text.count("^") - accidental_text.count("_")
+        bar_accidentals[(base_letter, octave)] = accidental
+    else:
+        accidental = bar_accidentals.get((base_letter, octave), key_accidentals.get(base_letter, 0))
+    semitone = NOTE_LETTER_SEMITONES[base_letter] + accidental
+    return _pitch_name(semitone, octave), (octave * 12) + semitone
+
+
+def _abc_default_unit_length(rhythm):
+    # ABC 2.1: without L: the unit length is 1/16 for meters below 3/4 and 1/8 otherwise.
+    try:
+        meter = Fraction(rhythm)
+    except (ValueError, ZeroDivisionError):
+        return Fraction(1, 8)
+    return Fraction(1, 16) if meter < Fraction(3, 4) else Fraction(1, 8)
+
+
+def parse_abc_tune(tune_lines, zither_strings, chord_numbers=DEFAULT_CHORD_NUMBERS):
+    issues = []
+    piece_name = ""
+    rhythm = ""
+    unit_length = None
+    key_accidentals = {}
+    voice_ids = {}
+    voice_id = "1"
+    items = []
+    bar_accidentals = {}
+    in_body = False
+    pending_chord = None
+    next_length_factor = Fraction(1)
+    reported = set()
+
+    def report_once(message):
+        if message not in reported:
+            reported.add(message)
+            issues.append(message)
+
+    def apply_field(field, value):
+        nonlocal piece_name, rhythm, unit_length, key_accidentals, voice_id, in_body
+        value = value.split("%", 1)[0].strip()
+        if field == "T" and not piece_name:
+            piece_name = value
+        elif field == "M":
+            rhythm = {"C": "4/4", "C|": "2/2"}.get(value, value)
+        elif field == "L":
+            try:
+                unit_length = Fraction(value)
+            except (ValueError, ZeroDivisionError):
+                issues.append(f"Unit length L:{value} is not supported; using 1/8.")
+        elif field == "K":
+            key_accidentals = _abc_key_accidentals(value, issues)
+            if unit_length is None:
+                unit_length = _abc_default_unit_length(rhythm)
+            in_body = True
+        elif field == "V":
+            name = value.split()[0] if value else "1"
+            voice_id = voice_ids.setdefault(name, str(len(voice_ids) + 1))
+        elif field in ABC_UNSUPPORTED_FIELDS:
+            report_once(f"{ABC_UNSUPPORTED_FIELDS[field]} fields ({field}:) are not supported and were ignored.")
+
+    for line in tune_lines:
+        field_match = ABC_FIELD_RE.match(line)
+        if field_match:
+            apply_field(field_match.group(1), field_match.group(2))
+            continue
+        if not in_body or line.startswith("%"):
+            continue
+
+        body = line.split("%", 1)[0]
+        position = 0
+        while position < len(body):
+            token_match = ABC_TOKEN_RE.match(body, position)
+            if token_match is None:
+                report_once(f"Unsupported ABC symbol {body[position]!r} was skipped.")
+                position += 1
+                continue
+            position = token_match.end()
+            kind = token_match.lastgroup
+            token = token_match.group()
+
+            if kind == "chord_symbol":
+                text = token[1:-1]
+                if text and text[0] not in "^_<>@":
+                    pending_chord = text
+            elif kind == "inline_field":
+                apply_field(token[1], token[3:-1])
+            elif kind == "grace":
+                report_once("Grace notes are not supported and were skipped.")
+            elif kind == "tuplet":
+                report_once("Tuplets are not supported; their notes keep their written length.")
+            elif kind in {"note", "note_group"}:
+                try:
+                    if kind == "note_group":
+                        report_once("Note chords are reduced to their highest note.")
+                        group_text, _, outer_length = token[1:].rpartition("]")
+                        pitches = [
+                            (_abc_pitch(m, key_accidentals, bar_accidentals), _abc_length_multiplier(m.group("length")))
+                            for m in ABC_PITCH_RE.finditer(group_text)
+                        ]
+                        (pitch_name, _), inner_multiplier = max(pitches, key=lambda item: item[0][1])
+                        multiplier = inner_multiplier * _abc_length_multiplier(outer_length)
+                    else:
+                        pitch_match = ABC_PITCH_RE.fullmatch(token)
+                        pitch_name, _ = _abc_pitch(pitch_match, key_accidentals, bar_accidentals)
+                        multiplier = _abc_length_multiplier(pitch_match.group("length"))
+                except (ValueError, ZeroDivisionError):
+                    report_once("Notes with an invalid length were skipped.")
+                    continue
+                items.append(["note", voice_id, pitch_name, unit_length * multiplier * next_length_factor, pending_chord])
+                pending_chord = None
+                next_length_factor = Fraction(1)
+            elif kind == "rest":
+                try:
+                    multiplier = _abc_length_multiplier(token[1:])
+                except (ValueError, ZeroDivisionError):
+                    report_once("Rests with an invalid length were skipped.")
+                    continue
+                items.append(["rest", voice_id, None, unit_length * multiplier * next_length_factor, pending_chord])
+                pending_chord = None
+                next_length_factor = Fraction(1)
+            elif kind == "multi_rest":
+                report_once("Multi-measure rests are not supported and were skipped.")
+            elif kind == "bar":
+                bar_accidentals = {}
+                if ":" in token or token[-1].isdigit():
+                    report_once("Repeats and endings are not expanded.")
+            elif kind == "broken":
+                if items and items[-1][1] == voice_id:
+                    factor = Fraction(1, 2 ** len(token))
+                    longer, shorter = 2 - factor, factor
+                    if token[0] == "<":
+                        longer, shorter = shorter, longer
+                    items[-1][3] *= longer
+                    next_length_factor = shorter
+            elif kind == "tie":
+                report_once("Ties are not supported; tied notes are kept as separate notes.")
+
+    if pending_chord is not None:
+        issues.append(f"Chord symbol {pending_chord!r} at the end of the tune was skipped.")
+    voices = build_events([tuple(item) for item in items], zither_strings, chord_numbers, issues)
+    return {"piece_name": piece_name, "rhythm": rhythm, "voices": voices or {"1": []}, "issues": issues}
+
+
+# ---- MusicXML ----
+
+
+@contextlib.contextmanager
+def _open_musicxml(source_path):
+    # Closes the .mxl archive together with the member stream; bulk imports would otherwise leak a handle per file.
+    source_path = Path(source_path)
+    if source_path.suffix.lower() != ".mxl":
+        with open(source_path, "rb") as handle:
+            yield handle
+        return
+    with zipfile.ZipFile(source_path) as archive:
+        container = ET.fromstring(archive.read("META-INF/container.xml"))
+        rootfile = next(element for element in container.iter() if element.tag.endswith("rootfile"))
+        with archive.open(rootfile.get("full-path")) as handle:
+            yield handle
+
+
+def _local_tag(element):
+    return element.tag.rsplit("}", 1)[-1]
+
+
+def _child_text(element, tag, default=""):
+    for child in element:
+        if _local_tag(child) == tag:
+            return (child.text or "").strip()
+    return default
+
+
+def _find_child(element, tag):
+    for child in element:
+        if _local_tag(child) == tag:
+            return child
+    return None
+
+
+def iter_musicxml_tunes(source_path, zither_strings, chord_numbers=DEFAULT_CHORD_NUMBERS):
+    # Measures are converted and cleared as soon as they are parsed, so memory only grows with the converted events.
+    with _open_musicxml(source_path) as handle:
+        tune = None
+        part_id = None
+        voice_ids = {}
+        items = []
+        pending_chord = None
+        measure_length = None
+        reported = set()
+        for event, element in ET.iterparse(handle, events=("start", "end")):
+            tag = _local_tag(element)
+            if event == "start":
+                if tag in {"score-partwise", "score-timewise"}:
+                    tune = {"piece_name": "", "rhythm": "", "issues": []}
+                    voice_ids = {}
+                    items = []
+                    measure_length = None
+                    reported = set()
+                    if tag == "score-timewise":
+                        tune["issues"].append("Timewise scores are not supported.")
+                elif tag == "part":
+                    part_id = element.get("id", "")
+                    pending_chord = None
+                continue
+
+            if tune is None:
+                continue
+            if tag in {"work-title", "movement-title"} and not tune["piece_name"]:
+                tune["piece_name"] = (element.text or "").strip()
+            elif tag == "measure":
+                for child in element:
+                    child_tag = _local_tag(child)
+                    if child_tag == "attributes":
+                        time_element = _find_child(child, "time")
+                        if time_element is not None:
+                            beats = _child_text(time_element, "beats")
+                            beat_type = _child_text(time_element, "beat-type")
+                            tune["rhythm"] = tune["rhythm"] or f"{beats}/{beat_type}"
+                            try:
+                                measure_length = Fraction(int(beats), int(beat_type))
+                            except ValueError:
+                                measure_length = None
+                    elif child_tag == "harmony":
+                        root = _find_child(child, "root")
+                        if root is None:
+                            continue
+                        alter = _child_text(root, "root-alter", "0")
+                        symbol = _child_text(root, "root-step") + {"1": "#", "-1": "b"}.get(alter, "")
+                        kind = _child_text(child, "kind", "major")
+                        pending_chord = symbol + {"major": "", "dominant": "7"}.get(kind, f" {kind}")
+                    elif child_tag == "note":
+                        voice_key = (part_id, _child_text(child, "voice", "1"))
+                        voice_id = voice_ids.setdefault(voice_key, str(len(voice_ids) + 1))
+                        note_items = _musicxml_note_items(
+                            child, voice_id, pending_chord, measure_length, tune["issues"], reported
+                        )
+                        if note_items is None:
+                            continue
+                        kind, pitch_name, pitch_value, length, chord_symbol = note_items
+                        if _find_child(child, "chord") is not None:
+                            if "chord" not in reported:
+                                reported.add("chord")
+                                tune["issues"].append("Note chords are reduced to their highest note.")
+                            previous = next((item for item in reversed(items) if item[1] == voice_id), None)
+                            if previous is not None and previous[0] == "note" and pitch_value > previous[5]:
+                                previous[2] = pitch_name
+                                previous[5] = pitch_value
+                            continue
+                        items.append([kind, voice_id, pitch_name, length, chord_symbol, pitch_value])
+                        pending_chord = None
+                element.clear()
+            elif tag == "part":
+                element.clear()
+            elif tag in {"score-partwise", "score-timewise"}:
+                issues = tune["issues"]
+                if pending_chord is not None:
+                    issues.append(f"Chord symbol {pending_chord!r} at the end of the piece was skipped.")
+                voices = build_events([tuple(item[:5]) for item in items], zither_strings, chord_numbers, issues)
+                tune["voices"] = voices or {"1": []}
+                yield tune
+                element.clear()
+                tune = None
+
+
+def _musicxml_note_items(note, voice_id, chord_symbol, measure_length, issues, reported):
+    if _find_child(note, "grace") is not None:
+        if "grace" not in reported:
+            reported.add("grace")
+            issues.append("Grace notes are not supported and were skipped.")
+        return None
+    if _find_child(note, "time-modification") is not None and "tuplet" not in reported:
+        reported.add("tuplet")
+        issues.append("Tuplets are not supported; their notes keep their written length.")
+    if _find_child(note, "tie") is not None and "tie" not in reported:
+        reported.add("tie")
+        issues.append("Ties are not supported; tied notes are kept as separate notes.")
+
+    note_type = _child_text(note, "type")
+    base_length = next(
+        (length for length, duration in DURATION_BY_LENGTH.items() if duration == MUSICXML_DURATION_TYPES.get(note_type)),
+        None,
+    )
+    rest = _find_child(note, "rest")
+    if base_length is None and rest is not None and rest.get("measure") == "yes":
+        base_length = measure_length
+    if base_length is None:
+        issues.append(f"Voice {voice_id}: note type {note_type or '(none)'!r} is not supported and was skipped.")
+        return None
+    dot_count = sum(1 for child in note if _local_tag(child) == "dot")
+    length = base_length * (Fraction(3, 2) ** dot_count)
+
+    if rest is not None:
+        return "rest", None, -1, length, chord_symbol
+    pitch = _find_child(note, "pitch")
+    if pitch is None:
+        issues.append(f"Voice {voice_id}: unpitched note was skipped.")
+        return None
+    semitone = NOTE_LETTER_SEMITONES[_child_text(pitch, "step").lower()] + int(float(_child_text(pitch, "alter", "0")))
+    octave = int(_child_text(pitch, "octave")) - ZITHER_OCTAVE_OFFSET
+    return "note", _pitch_name(semitone, octave), (octave * 12) + semitone, length, chord_symbol
+
+
+# ---- Bulk import ----
+
+
+def iter_tunes(source_path, instrument=DEFAULT_INSTRUMENT_PROFILE, chord_numbers=DEFAULT_CHORD_NUMBERS):
+    layout = get_instrument_layout(instrument)
+    zither_strings = layout["strings"]
+    # Chord symbols mapped to a bar the instrument does not have are reported like unknown roots.
+    chord_numbers = {root: number for root, number in chord_numbers.items() if number <= layout["chord_count"]}
+    suffix = Path(source_path).suffix.lower()
+    if suffix == ".abc":
+        for tune_lines in iter_abc_tunes(source_path):
+            yield parse_abc_tune(tune_lines, zither_strings, chord_numbers)
+    elif suffix in {".xml", ".musicxml", ".mxl"}:
+        yield from iter_musicxml_tunes(source_path, zither_strings, chord_numbers)
+    else:
+        raise ValueError(f"Unsupported source file type: {source_path}")
+
+
+def import_collection(source_path, output_dir, instrument=DEFAULT_INSTRUMENT_PROFILE, chord_numbers=DEFAULT_CHORD_NUMBERS):
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    for index, tune in enumerate(iter_tunes(source_path, instrument, chord_numbers), start=1):
+        piece_name = tune["piece_name"]
+        output_path = output_dir / f"{index:04d}_{_slugify(piece_name)}.json"
+        save_project_data(tune["voices"], piece_name, tune["rhythm"], output_path, instrument)
+        yield output_path, tune["issues"]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Import ABC or MusicXML tune collections as zither projects.")
+    parser.add_argument("sources", nargs="+", type=Path, help="ABC (.abc) or MusicXML (.xml, .musicxml, .mxl) files")
+    parser.add_argument("--output-dir", type=Path, default=Path("imported"))
+    parser.add_argument("--instrument", default=DEFAULT_INSTRUMENT_PROFILE)
+    args = parser.parse_args(argv)
+
+    tune_count = 0
+    issue_count = 0
+    for source_path in args.sources:
+        target_dir = args.output_dir / _slugify(source_path.stem)
+        for output_path, issues in import_collection(source_path, target_dir, args.instrument):
+            tune_count += 1
+            issue_count += len(issues)
+            for issue in issues:
+                print(f"Hinweis: {output_path.name}: {issue}")
+    print(f"Imported {tune_count} tunes with {issue_count} notices into {args.output_dir}.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
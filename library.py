@@ -0,0 +1,402 @@
+import argparse
+import hashlib
+import json
+import sqlite3
+import sys
+import time
+import tkinter as tk
+from pathlib import Path
+from tkinter import filedialog, messagebox, ttk
+
+from main import (
+    CHORD_OPTIONS,
+    DEFAULT_INSTRUMENT_PROFILE,
+    INSTRUMENT_OPTIONS,
+    INSTRUMENT_PROFILES,
+    RHYTHM_OPTIONS,
+    get_instrument_layout,
+    parse_melody_entry,
+    parse_project_data,
+)
+
+# ---- Konfiguration ----
+
+LIBRARY_DB_FILE = Path("library.sqlite3")
+SEARCH_LIMIT = 500
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS roots (
+    path TEXT PRIMARY KEY
+);
+CREATE TABLE IF NOT EXISTS projects (
+    path TEXT PRIMARY KEY,
+    mtime REAL NOT NULL,
+    size INTEGER NOT NULL,
+    content_hash TEXT NOT NULL,
+    piece_name TEXT NOT NULL,
+    rhythm TEXT NOT NULL,
+    instrument TEXT NOT NULL,
+    voice_count INTEGER NOT NULL,
+    event_count INTEGER NOT NULL,
+    note_count INTEGER NOT NULL,
+    rest_count INTEGER NOT NULL,
+    between_chord_count INTEGER NOT NULL,
+    lowest_string INTEGER,
+    highest_string INTEGER,
+    lowest_note TEXT,
+    highest_note TEXT
+);
+CREATE TABLE IF NOT EXISTS project_chords (
+    path TEXT NOT NULL REFERENCES projects(path) ON DELETE CASCADE,
+    chord_number INTEGER NOT NULL,
+    uses INTEGER NOT NULL,
+    PRIMARY KEY (path, chord_number)
+);
+CREATE INDEX IF NOT EXISTS projects_rhythm ON projects(rhythm);
+CREATE INDEX IF NOT EXISTS projects_instrument ON projects(instrument);
+CREATE INDEX IF NOT EXISTS projects_piece_name ON projects(piece_name COLLATE NOCASE);
+CREATE INDEX IF NOT EXISTS project_chords_chord ON project_chords(chord_number, path);
+"""
+
+
+def open_library(db_path=LIBRARY_DB_FILE):
+    connection = sqlite3.connect(str(db_path))
+    connection.row_factory = sqlite3.Row
+    connection.execute("PRAGMA foreign_keys = ON")
+    connection.executescript(SCHEMA)
+    return connection
+
+
+def project_statistics(voice_melodies, instrument=DEFAULT_INSTRUMENT_PROFILE):
+    # Invalid entries are skipped here; validator.py reports them.
+    layout = get_instrument_layout(instrument if instrument in INSTRUMENT_PROFILES else DEFAULT_INSTRUMENT_PROFILE)
+    zither_strings = layout["strings"]
+    stats = {
+        "voice_count": sum(1 for events in voice_melodies.values() if events),
+        "event_count": 0,
+        "note_count": 0,
+        "rest_count": 0,
+        "between_chord_count": 0,
+        "lowest_note": None,
+        "highest_note": None,
+        "chords": {},
+    }
+    lowest_string = highest_string = None
+    for events in voice_melodies.values():
+        stats["event_count"] += len(events)
+        for entry in events:
+            try:
+                parsed = parse_melody_entry(entry, layout["chord_count"])
+            except (TypeError, ValueError):
+                continue
+            if parsed["kind"] == "rest":
+                stats["rest_count"] += 1
+                continue
+            if parsed["kind"] == "chord_between":
+                stats["between_chord_count"] += 1
+                chord_number = parsed["chord_number"]
+                stats["chords"][chord_number] = stats["chords"].get(chord_number, 0) + 1
+                continue
+
+            stats["note_count"] += 1
+            if parsed.get("chord_with_note") is not None:
+                chord_number = parsed["chord_with_note"][0]
+                stats["chords"][chord_number] = stats["chords"].get(chord_number, 0) + 1
+            string_number = zither_strings.get(parsed["note_name"])
+            if string_number is None:
+                continue
+            if lowest_string is None or string_number < lowest_string:
+                lowest_string = string_number
+                stats["lowest_note"] = parsed["note_name"]
+            if highest_string is None or string_number > highest_string:
+                highest_string = string_number
+                stats["highest_note"] = parsed["note_name"]
+    stats["lowest_string"] = lowest_string
+    stats["highest_string"] = highest_string
+    return stats
+
+
+def _index_project(connection, path, mtime, size, content_hash, content):
+    # Parses the bytes that were hashed, so the stored hash always belongs to the indexed content.
+    voice_melodies, piece_name, rhythm, instrument = parse_project_data(json.loads(content.decode("utf-8")))
+    stats = project_statistics(voice_melodies, instrument)
+    connection.execute("DELETE FROM projects WHERE path = ?", (str(path),))
+    connection.execute(
+        """
+        INSERT INTO projects (
+            path, mtime, size, content_hash, piece_name, rhythm, instrument, voice_count, event_count,
+            note_count, rest_count, between_chord_count, lowest_string, highest_string, lowest_note, highest_note
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """,
+        (
+            str(path),
+            mtime,
+            size,
+            content_hash,
+            piece_name,
+            rhythm,
+            instrument,
+            stats["voice_count"],
+            stats["event_count"],
+            stats["note_count"],
+            stats["rest_count"],
+            stats["between_chord_count"],
+            stats["lowest_string"],
+            stats["highest_string"],
+            stats["lowest_note"],
+            stats["highest_note"],
+        ),
+    )
+    connection.executemany(
+        "INSERT INTO project_chords (path, chord_number, uses) VALUES (?, ?, ?)",
+        [(str(path), chord_number, uses) for chord_number, uses in sorted(stats["chords"].items())],
+    )
+
+
+def update_library(roots=None, db_path=LIBRARY_DB_FILE):
+    # Files whose mtime and size are unchanged are skipped without reading them; changed files are only
+    # re-parsed when their content hash differs. Projects that disappeared from all roots are removed.
+    summary = {"scanned": 0, "added": 0, "updated": 0, "unchanged": 0, "removed": 0, "failed": []}
+    with open_library(db_path) as connection:
+        for root in roots or []:
+            connection.execute("INSERT OR IGNORE INTO roots (path) VALUES (?)", (str(Path(root).resolve()),))
+        known = {
+            row["path"]: (row["mtime"], row["size"], row["content_hash"])
+            for row in connection.execute("SELECT path, mtime, size, content_hash FROM projects")
+        }
+        seen = set()
+        for row in connection.execute("SELECT path FROM roots ORDER BY path").fetchall():
+            root = Path(row["path"])
+            if not root.is_dir():
+                continue
+            for path in sorted(root.rglob("*.json")):
+                key = str(path)
+                if key in seen:
+                    continue
+                seen.add(key)
+                summary["scanned"] += 1
+                previous = known.get(key)
+                try:
+                    stat = path.stat()
+                    if previous is not None and previous[0] == stat.st_mtime and previous[1] == stat.st_size:
+                        summary["unchanged"] += 1
+                        continue
+                    content = path.read_bytes()
+                    content_hash = hashlib.sha256(content).hexdigest()
+                    if previous is not None and previous[2] == content_hash:
+                        connection.execute(
+                            "UPDATE projects SET mtime = ?, size = ? WHERE path = ?", (stat.st_mtime, stat.st_size, key)
+                        )
+                        summary["unchanged"] += 1
+                        continue
+                    _index_project(connection, path, stat.st_mtime, stat.st_size, content_hash, content)
+                except (OSError, ValueError, TypeError, AttributeError) as exc:
+                    # Drop the old row so that search does not keep returning stale data for a broken file.
+                    connection.execute("DELETE FROM projects WHERE path = ?", (key,))
+                    summary["failed"].append((key, str(exc)))
+                    continue
+                summary["updated" if previous is not None else "added"] += 1
+
+        removed = [(path,) for path in known if path not in seen]
+        connection.executemany("DELETE FROM projects WHERE path = ?", removed)
+        summary["removed"] = len(removed)
+    connection.close()
+    return summary
+
+
+def search_library(
+    name=None,
+    rhythm=None,
+    chord=None,
+    instrument=None,
+    voice_count=None,
+    note=None,
+    db_path=LIBRARY_DB_FILE,
+    limit=SEARCH_LIMIT,
+):
+    # note restricts the results to pieces whose pitch range covers that note, e.g. "c2".
+    conditions = []
+    parameters = []
+    if name:
+        conditions.append("p.piece_name LIKE ? COLLATE NOCASE")
+        parameters.append(f"%{name}%")
+    if rhythm:
+        conditions.append("p.rhythm = ?")
+        parameters.append(rhythm)
+    if instrument:
+        conditions.append("p.instrument = ?")
+        parameters.append(instrument)
+    if voice_count is not None:
+        conditions.append("p.voice_count = ?")
+        parameters.append(int(voice_count))
+    if chord is not None:
+        conditions.append("EXISTS (SELECT 1 FROM project_chords c WHERE c.chord_number = ? AND c.path = p.path)")
+        parameters.append(int(chord))
+    if note:
+        string_number = get_instrument_layout(instrument or DEFAULT_INSTRUMENT_PROFILE)["strings"].get(note)
+        if string_number is None:
+            return []
+        conditions.append("p.lowest_string <= ? AND p.highest_string >= ?")
+        parameters.extend([string_number, string_number])
+
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    query = f"""
+        SELECT p.*, (
+            SELECT group_concat(c.chord_number, ',') FROM project_chords c WHERE c.path = p.path
+        ) AS chords
+        FROM projects p {where}
+        ORDER BY p.piece_name COLLATE NOCASE, p.path
+        LIMIT ?
+    """
+    with open_library(db_path) as connection:
+        rows = [dict(row) for row in connection.execute(query, [*parameters, limit])]
+    connection.close()
+    return rows
+
+
+def format_search_result(row):
+    pitch_range = f"{row['lowest_note']}-{row['highest_note']}" if row["lowest_note"] else "-"
+    name = row["piece_name"] or "Untitled Piece"
+    return (
+        f"{name[:32]:<32} {row['rhythm'] or '-':>5} {row['instrument']:>12} "
+        f"{row['voice_count']}v {row['note_count']:>5}n {pitch_range:>9} chords:{row['chords'] or '-'}"
+    )
+
+
+def open_library_window(parent, on_open, db_path=LIBRARY_DB_FILE):
+    window = tk.Toplevel(parent)
+    window.title("Project Library")
+    window.geometry("900x480")
+
+    search_frame = ttk.Frame(window, padding=12)
+    search_frame.pack(fill="x")
+
+    ttk.Label(search_frame, text="Name").grid(row=0, column=0, sticky="w")
+    name_var = tk.StringVar()
+    ttk.Entry(search_frame, textvariable=name_var, width=28).grid(row=1, column=0, padx=(0, 10), sticky="w")
+
+    ttk.Label(search_frame, text="Rhythm").grid(row=0, column=1, sticky="w")
+    rhythm_var = tk.StringVar(value="any")
+    ttk.Combobox(
+        search_frame, textvariable=rhythm_var, values=["any"] + RHYTHM_OPTIONS, width=8, state="readonly"
+    ).grid(row=1, column=1, padx=(0, 10), sticky="w")
+
+    ttk.Label(search_frame, text="Chord").grid(row=0, column=2, sticky="w")
+    chord_var = tk.StringVar(value="any")
+    ttk.Combobox(
+        search_frame, textvariable=chord_var, values=["any"] + CHORD_OPTIONS[1:], width=8, state="readonly"
+    ).grid(row=1, column=2, padx=(0, 10), sticky="w")
+
+    ttk.Label(search_frame, text="Instrument").grid(row=0, column=3, sticky="w")
+    instrument_var = tk.StringVar(value="any")
+    ttk.Combobox(
+        search_frame, textvariable=instrument_var, values=["any"] + INSTRUMENT_OPTIONS, width=12, state="readonly"
+    ).grid(row=1, column=3, padx=(0, 10), sticky="w")
+
+    status_var = tk.StringVar(value="")
+    ttk.Label(window, textvariable=status_var, padding=(12, 0)).pack(fill="x")
+
+    list_frame = ttk.Frame(window, padding=12)
+    list_frame.pack(fill="both", expand=True)
+    result_list = tk.Listbox(list_frame, font=("Courier", 11))
+    result_list.pack(side="left", fill="both", expand=True)
+    scroll = ttk.Scrollbar(list_frame, orient="vertical", command=result_list.yview)
+    scroll.pack(side="right", fill="y")
+    result_list.configure(yscrollcommand=scroll.set)
+    result_paths = []
+
+    def run_search(*_):
+        start = time.perf_counter()
+        rows = search_library(
+            name=name_var.get().strip() or None,
+            rhythm=None if rhythm_var.get() == "any" else rhythm_var.get(),
+            chord=None if chord_var.get() == "any" else int(chord_var.get()),
+            instrument=None if instrument_var.get() == "any" else instrument_var.get(),
+            db_path=db_path,
+        )
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        result_list.delete(0, tk.END)
+        result_paths.clear()
+        for row in rows:
+            result_list.insert(tk.END, format_search_result(row))
+            result_paths.append(row["path"])
+        status_var.set(f"{len(rows)} pieces found in {elapsed_ms:.1f} ms")
+
+    def update_index(roots=None):
+        try:
+            summary = update_library(roots, db_path)
+        except (OSError, sqlite3.Error) as exc:
+            messagebox.showerror("Error", str(exc), parent=window)
+            return
+        status_var.set(
+            f"Index updated: {summary['added']} added, {summary['updated']} updated, "
+            f"{summary['removed']} removed, {len(summary['failed'])} failed"
+        )
+        run_search()
+
+    def add_folder():
+        folder = filedialog.askdirectory(title="Add Project Folder", parent=window)
+        if folder:
+            update_index([folder])
+
+    def open_selected(*_):
+        selection = result_list.curselection()
+        if not selection:
+            return
+        on_open(Path(result_paths[selection[0]]))
+        window.destroy()
+
+    ttk.Button(search_frame, text="Search", command=run_search).grid(row=1, column=4, padx=(0, 8), sticky="w")
+    ttk.Button(search_frame, text="Add Folder...", command=add_folder).grid(row=1, column=5, padx=(0, 8), sticky="w")
+    ttk.Button(search_frame, text="Update Index", command=update_index).grid(row=1, column=6, padx=(0, 8), sticky="w")
+    ttk.Button(search_frame, text="Open", command=open_selected).grid(row=1, column=7, sticky="w")
+    result_list.bind("<Double-Button-1>", open_selected)
+    window.bind("<Return>", run_search)
+    run_search()
+    return window
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Index and search zither project files.")
+    parser.add_argument("--db", type=Path, default=LIBRARY_DB_FILE)
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    update_parser = subparsers.add_parser("update", help="add project folders and refresh the index")
+    update_parser.add_argument("roots", nargs="*", type=Path)
+
+    search_parser = subparsers.add_parser("search", help="search indexed projects")
+    search_parser.add_argument("--name")
+    search_parser.add_argument("--rhythm")
+    search_parser.add_argument("--chord", type=int)
+    search_parser.add_argument("--instrument")
+    search_parser.add_argument("--voices", type=int)
+    search_parser.add_argument("--note", help="only pieces whose range covers this note, e.g. c2")
+    search_parser.add_argument("--json", action="store_true", help="print rows as JSON")
+
+    args = parser.parse_args(argv)
+    if args.command == "update":
+        start = time.perf_counter()
+        summary = update_library(args.roots, args.db)
+        for path, message in summary["failed"]:
+            print(f"Hinweis: {path} could not be indexed: {message}")
+        print(
+            f"{summary['scanned']} projects scanned, {summary['added']} added, {summary['updated']} updated, "
+            f"{summary['unchanged']} unchanged, {summary['removed']} removed "
+            f"in {(time.perf_counter() - start) * 1000:.0f} ms."
+        )
+        return 0
+
+    start = time.perf_counter()
+    rows = search_library(args.name, args.rhythm, args.chord, args.instrument, args.voices, args.note, args.db)
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    if args.json:
+        print(json.dumps(rows, indent=2))
+    else:
+        for row in rows:
+            print(f"{format_search_result(row)}  {row['path']}")
+    print(f"{len(rows)} pieces found in {elapsed_ms:.1f} ms.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,26 +1,41 @@
+import functools
 import json
 import math
+import types
 from pathlib import Path
 import tkinter as tk
 from tkinter import filedialog, messagebox, ttk
 from datetime import date
 
 from reportlab.lib import colors
-from reportlab.lib.pagesizes import A4
+from reportlab.lib.pagesizes import A4, LETTER
 from reportlab.lib.units import mm
 from reportlab.pdfgen import canvas
 
+from pdf_writer import DirectCanvas
+
+try:
+    import numpy as np
+except ImportError:  # numpy is optional; without it the scalar layout path is used.
+    np = None
+
 # ---- Konfiguration ----
 
 CHROMATIC_STEPS = ["c", "c#", "d", "d#", "e", "f", "f#", "g", "g#", "a", "a#", "b"]
 ZITHER_NOTE_COUNT = 25
 
-ZITHER_STRINGS = {}
-for i in range(ZITHER_NOTE_COUNT):
-    semitone = i % 12
-    octave = 1 + (i // 12)
-    note_name = f"{CHROMATIC_STEPS[semitone]}{octave}"
-    ZITHER_STRINGS[note_name] = i + 1
+
+def build_zither_strings(note_count):
+    zither_strings = {}
+    for i in range(note_count):
+        semitone = i % 12
+        octave = 1 + (i // 12)
+        note_name = f"{CHROMATIC_STEPS[semitone]}{octave}"
+        zither_strings[note_name] = i + 1
+    return zither_strings
+
+
+ZITHER_STRINGS = build_zither_strings(ZITHER_NOTE_COUNT)
 
 PAGE_WIDTH, PAGE_HEIGHT = A4
 TOP_MARGIN = 28
@@ -47,6 +62,54 @@ CHORD_BETWEEN_SPACING_MM = 4.0
 NOTE_MASK_PADDING_MM = 0.6
 NOTE_ROTATION_DEG = 90
 CHORD_WITH_DOT_EXTRA_OFFSET_MM = 3.0
+NOTE_RADIUS = 5
+# Voices with at least this many notes use the numpy layout path when numpy is installed.
+VECTORIZED_LAYOUT_MIN_NOTES = 64
+
+# Instrument profiles: chord/melody string counts, string spacing and paper size.
+# "6/25" is the original layout and stays the default.
+INSTRUMENT_PROFILES = {
+    "6/25": {
+        "chord_count": 6,
+        "melody_string_count": 25,
+        "string_spacing_mm": STRING_CENTER_SPACING_MM,
+        "alignment_error_lines": ALIGNMENT_ERROR_LINES,
+        "page_size": A4,
+    },
+    "6/25 Letter": {
+        "chord_count": 6,
+        "melody_string_count": 25,
+        "string_spacing_mm": STRING_CENTER_SPACING_MM,
+        "alignment_error_lines": ALIGNMENT_ERROR_LINES,
+        "page_size": LETTER,
+    },
+    "6/26": {
+        "chord_count": 6,
+        "melody_string_count": 26,
+        "string_spacing_mm": STRING_CENTER_SPACING_MM,
+        "alignment_error_lines": ALIGNMENT_ERROR_LINES,
+        "page_size": A4,
+    },
+    "6/26 Letter": {
+        "chord_count": 6,
+        "melody_string_count": 26,
+        "string_spacing_mm": STRING_CENTER_SPACING_MM,
+        "alignment_error_lines": ALIGNMENT_ERROR_LINES,
+        "page_size": LETTER,
+    },
+    "5/21": {
+        "chord_count": 5,
+        "melody_string_count": 21,
+        "string_spacing_mm": STRING_CENTER_SPACING_MM,
+        "alignment_error_lines": ALIGNMENT_ERROR_LINES,
+        "page_size": A4,
+    },
+}
+DEFAULT_INSTRUMENT_PROFILE = "6/25"
+INSTRUMENT_OPTIONS = list(INSTRUMENT_PROFILES.keys())
+
+PDF_BACKENDS = ["reportlab", "direct"]
+DEFAULT_PDF_BACKEND = "reportlab"
 
 INPUT_MELODY_FILE = Path("melody_input.json")
 OUTPUT_PDF_FILE = "ouput.pdf"
@@ -58,7 +121,11 @@ RHYTHM_FONT_SIZE = 9
 
 DURATION_OPTIONS = ["whole", "half", "quarter", "eighth", "sixteenth"]
 REST_NAME_MAP = {"full": "whole", "whole": "whole", "half": "half", "quarter": "quarter"}
-CHORD_OPTIONS = ["none", "1", "2", "3", "4", "5", "6"]
+# Covers the chord bars of every profile; the editor offers only those of the selected instrument.
+CHORD_OPTIONS = ["none"] + [
+    str(chord_number)
+    for chord_number in range(1, max(profile["chord_count"] for profile in INSTRUMENT_PROFILES.values()) + 1)
+]
 CHORD_STRING_OPTIONS = ["4", "3", "2", "1"]
 RHYTHM_OPTIONS = ["2/4", "3/4", "4/4", "6/8", "12/8"]
 
@@ -99,9 +166,7 @@ def draw_augmentation_dot(canvas_obj, x, y, note_radius):
     return dot_x, dot_radius
 
 
-def draw_rest_symbol(canvas_obj, x1, y1, x2, y2, rest_duration):
-    mx = (x1 + x2) / 2
-    my = (y1 + y2) / 2
+def draw_rest_symbol_at(canvas_obj, mx, my, rest_duration):
     symbol_w = REST_SYMBOL_WIDTH_MM * mm
     symbol_h = REST_SYMBOL_HEIGHT_MM * mm
 
@@ -121,22 +186,6 @@ def draw_rest_symbol(canvas_obj, x1, y1, x2, y2, rest_duration):
         canvas_obj.line(mx - 0.2 * step, my - 0.2 * symbol_h, mx + 0.8 * step, my - 1.0 * symbol_h)
 
 
-def draw_connector_line(canvas_obj, x1, y1, x2, y2, endpoint_gap):
-    dx = x2 - x1
-    dy = y2 - y1
-    length = math.hypot(dx, dy)
-    if length <= 2 * endpoint_gap:
-        return
-
-    ux = dx / length
-    uy = dy / length
-    sx = x1 + ux * endpoint_gap
-    sy = y1 + uy * endpoint_gap
-    ex = x2 - ux * endpoint_gap
-    ey = y2 - uy * endpoint_gap
-    canvas_obj.line(sx, sy, ex, ey)
-
-
 def draw_cut_label(canvas_obj, x1, y1, x2, y2):
     dx = x2 - x1
     dy = y2 - y1
@@ -185,11 +234,9 @@ def _chord_label(chord_number, string_count):
     return f"{chord_number}({string_count})"
 
 
-def draw_chords_between_notes(canvas_obj, x1, y1, x2, y2, chord_specs):
+def draw_chords_between_notes_at(canvas_obj, mx, my, chord_specs):
     if not chord_specs:
         return
-    mx = (x1 + x2) / 2
-    my = (y1 + y2) / 2
     count = len(chord_specs)
     spacing = CHORD_BETWEEN_SPACING_MM * mm
     start_x = mx - ((count - 1) * spacing / 2)
@@ -218,8 +265,8 @@ def draw_chords_between_notes(canvas_obj, x1, y1, x2, y2, chord_specs):
         canvas_obj.restoreState()
 
 
-def min_x_outside_cutout(y, base_left_x, note_radius):
-    y_from_top = PAGE_HEIGHT - y
+def min_x_outside_cutout(y, base_left_x, note_radius, page_height=PAGE_HEIGHT):
+    y_from_top = page_height - y
     cut_left = CUT_LEFT_EDGE_MM * mm
     cut_top = CUT_TOP_EDGE_MM * mm
 
@@ -229,6 +276,61 @@ def min_x_outside_cutout(y, base_left_x, note_radius):
     return base_left_x
 
 
+@functools.lru_cache(maxsize=None)
+def get_instrument_layout(instrument=DEFAULT_INSTRUMENT_PROFILE):
+    # Precomputed once per process and profile. The result is shared by all callers, so it is read-only.
+    if instrument not in INSTRUMENT_PROFILES:
+        raise ValueError(f"Unknown instrument profile: {instrument}")
+    profile = INSTRUMENT_PROFILES[instrument]
+    page_width, page_height = profile["page_size"]
+    zither_strings = build_zither_strings(profile["melody_string_count"])
+
+    available_height = page_height - TOP_MARGIN - BOTTOM_MARGIN
+    string_count = len(zither_strings)
+    string_reference_width = STRING_REFERENCE_WIDTH_MM * mm
+    string_intervals = max(string_count - 1, 1)
+    base_spacing = profile["string_spacing_mm"] * mm
+    spacing_correction = (profile["alignment_error_lines"] * base_spacing) / string_intervals
+    string_spacing = base_spacing + spacing_correction
+    required_height = string_reference_width + max(string_count - 1, 0) * string_spacing
+    if required_height > available_height:
+        raise ValueError(
+            f"String layout of instrument profile {instrument} does not fit the page margins "
+            "with corrected spacing. Reduce margins or lower alignment_error_lines."
+        )
+
+    top_line_center_y = page_height - TOP_MARGIN - (string_reference_width / 2)
+    base_left_x = SIDE_MARGIN + NOTE_SIDE_PADDING
+    right_x = page_width - SIDE_MARGIN - NOTE_SIDE_PADDING
+
+    # Index 0 is unused so that both tables can be indexed by string number directly.
+    string_y = [0.0] * (string_count + 1)
+    string_min_x = [base_left_x] * (string_count + 1)
+    for string_number in range(1, string_count + 1):
+        y = top_line_center_y - (string_count - string_number) * string_spacing
+        string_y[string_number] = y
+        string_min_x[string_number] = min_x_outside_cutout(y, base_left_x, NOTE_RADIUS, page_height)
+
+    return types.MappingProxyType(
+        {
+            "name": instrument,
+            "chord_count": profile["chord_count"],
+            "chord_options": tuple(CHORD_OPTIONS[: profile["chord_count"] + 1]),
+            "page_size": (page_width, page_height),
+            "page_width": page_width,
+            "page_height": page_height,
+            "strings": types.MappingProxyType(zither_strings),
+            "string_count": string_count,
+            "string_spacing": string_spacing,
+            "top_line_center_y": top_line_center_y,
+            "base_left_x": base_left_x,
+            "right_x": right_x,
+            "string_y": tuple(string_y),
+            "string_min_x": tuple(string_min_x),
+        }
+    )
+
+
 def _voice_sort_key(voice_id):
     text = str(voice_id)
     if text.isdigit():
@@ -236,7 +338,7 @@ def _voice_sort_key(voice_id):
     return 1, text
 
 
-def _parse_chord_spec(chord_value):
+def _parse_chord_spec(chord_value, chord_count=6):
     if isinstance(chord_value, (list, tuple)):
         if len(chord_value) == 2:
             chord_number = int(chord_value[0])
@@ -247,7 +349,7 @@ def _parse_chord_spec(chord_value):
         chord_number = int(chord_value)
         string_count = 4
 
-    if chord_number not in {1, 2, 3, 4, 5, 6}:
+    if not 1 <= chord_number <= chord_count:
         raise ValueError(f"Invalid chord number: {chord_number}")
     if string_count not in {1, 2, 3, 4}:
         raise ValueError(f"Invalid chord string count: {string_count}")
@@ -260,11 +362,11 @@ def _serialize_chord_spec(chord_number, string_count):
     return (chord_number, string_count)
 
 
-def parse_melody_entry(entry):
+def parse_melody_entry(entry, chord_count=6):
     if len(entry) == 2:
         name_or_rest, duration = entry
         if str(name_or_rest).lower() == "chord":
-            chord_number, string_count = _parse_chord_spec(duration)
+            chord_number, string_count = _parse_chord_spec(duration, chord_count)
             return {"kind": "chord_between", "chord_number": chord_number, "chord_string_count": string_count}
         if str(name_or_rest).lower() == "rest":
             return {"kind": "rest", "duration": duration}
@@ -279,7 +381,7 @@ def parse_melody_entry(entry):
                 "dotted": bool(third),
                 "chord_with_note": None,
             }
-        chord_number, string_count = _parse_chord_spec(third)
+        chord_number, string_count = _parse_chord_spec(third, chord_count)
         return {
             "kind": "note",
             "note_name": note_name,
@@ -290,7 +392,7 @@ def parse_melody_entry(entry):
     if len(entry) == 4:
         note_name, duration, dotted, chord_with_note = entry
         if chord_with_note is not None:
-            chord_with_note = _parse_chord_spec(chord_with_note)
+            chord_with_note = _parse_chord_spec(chord_with_note, chord_count)
         return {
             "kind": "note",
             "note_name": note_name,
@@ -301,8 +403,8 @@ def parse_melody_entry(entry):
     raise ValueError(f"Invalid melody entry format: {entry!r}")
 
 
-def build_drawable_notes(melody_entries):
-    parsed_melody = [parse_melody_entry(entry) for entry in melody_entries]
+def build_drawable_notes(melody_entries, zither_strings=ZITHER_STRINGS, chord_count=6):
+    parsed_melody = [parse_melody_entry(entry, chord_count) for entry in melody_entries]
     drawable_notes = []
     pending_rest = None
     pending_between_chords = []
@@ -315,7 +417,7 @@ def build_drawable_notes(melody_entries):
             continue
 
         note_name = entry["note_name"]
-        if note_name in ZITHER_STRINGS:
+        if note_name in zither_strings:
             drawable_notes.append(
                 (
                     note_name,
@@ -333,50 +435,252 @@ def build_drawable_notes(melody_entries):
     return drawable_notes
 
 
-def render_pdf(voice_melodies, piece_name="", rhythm="", output_pdf=OUTPUT_PDF_FILE):
-    available_height = PAGE_HEIGHT - TOP_MARGIN - BOTTOM_MARGIN
-    string_count = len(ZITHER_STRINGS)
-    string_reference_width = STRING_REFERENCE_WIDTH_MM * mm
-    string_intervals = max(string_count - 1, 1)
-    base_spacing = STRING_CENTER_SPACING_MM * mm
-    spacing_correction = (ALIGNMENT_ERROR_LINES * base_spacing) / string_intervals
-    string_spacing = base_spacing + spacing_correction
-    required_height = string_reference_width + max(string_count - 1, 0) * string_spacing
-    if required_height > available_height:
-        raise ValueError(
-            "String layout does not fit the page margins with corrected spacing. "
-            "Reduce margins or lower ALIGNMENT_ERROR_LINES."
-        )
+def _diagnostic(voice_id, event_index, severity, message):
+    return {"voice": voice_id, "event_index": event_index, "severity": severity, "message": message}
+
+
+def validate_project(voice_melodies, instrument=DEFAULT_INSTRUMENT_PROFILE):
+    # Single pass over all events; event_index is 1-based like the event list in the GUI.
+    if instrument not in INSTRUMENT_PROFILES:
+        return [_diagnostic(None, None, "error", f"Unknown instrument profile: {instrument}")]
+    layout = get_instrument_layout(instrument)
+    zither_strings = layout["strings"]
+    diagnostics = []
+    drawable_count = 0
+
+    for voice_id in sorted(voice_melodies.keys(), key=_voice_sort_key):
+        pending_rest_index = None
+        pending_chord_index = None
+        for event_index, entry in enumerate(voice_melodies[voice_id], start=1):
+            if not isinstance(entry, (list, tuple)):
+                diagnostics.append(_diagnostic(voice_id, event_index, "error", f"Invalid melody entry format: {entry!r}"))
+                continue
+            try:
+                parsed = parse_melody_entry(entry, layout["chord_count"])
+            except (TypeError, ValueError, OverflowError) as exc:
+                diagnostics.append(_diagnostic(voice_id, event_index, "error", str(exc)))
+                continue
+
+            if parsed["kind"] == "chord_between":
+                pending_chord_index = pending_chord_index or event_index
+                continue
+
+            # Project files are untrusted JSON; lists or numbers here would break the lookups below.
+            if not isinstance(parsed["duration"], str) or (
+                parsed["kind"] == "note" and not isinstance(parsed["note_name"], str)
+            ):
+                diagnostics.append(_diagnostic(voice_id, event_index, "error", f"Invalid melody entry format: {entry!r}"))
+                continue
+
+            duration = parsed["duration"].lower()
+            if parsed["kind"] == "rest":
+                if duration not in REST_NAME_MAP and duration not in DURATION_OPTIONS:
+                    diagnostics.append(_diagnostic(voice_id, event_index, "error", f"Unknown rest duration: {duration}"))
+                elif duration not in REST_NAME_MAP:
+                    diagnostics.append(
+                        _diagnostic(voice_id, event_index, "warning", f"{duration} rests are drawn without a rest symbol.")
+                    )
+                if pending_rest_index is not None:
+                    diagnostics.append(
+                        _diagnostic(voice_id, pending_rest_index, "warning", "Rest is replaced by the following rest.")
+                    )
+                pending_rest_index = event_index
+                continue
+
+            if parsed["duration"] not in DURATION_OPTIONS:
+                diagnostics.append(_diagnostic(voice_id, event_index, "error", f"Unknown duration: {parsed['duration']}"))
+            if parsed["note_name"] in zither_strings:
+                drawable_count += 1
+            else:
+                # Same rule as build_drawable_notes: the note is skipped, the rest of the sheet is still drawn.
+                diagnostics.append(
+                    _diagnostic(
+                        voice_id,
+                        event_index,
+                        "warning",
+                        f"Note {parsed['note_name']} is outside the range of the {instrument} zither and is not drawn.",
+                    )
+                )
+            pending_rest_index = None
+            pending_chord_index = None
 
-    top_line_center_y = PAGE_HEIGHT - TOP_MARGIN - (string_reference_width / 2)
+        if pending_rest_index is not None:
+            diagnostics.append(
+                _diagnostic(voice_id, pending_rest_index, "warning", "Rest at the end of the voice is not drawn.")
+            )
+        if pending_chord_index is not None:
+            diagnostics.append(
+                _diagnostic(voice_id, pending_chord_index, "warning", "Between-chord at the end of the voice is not drawn.")
+            )
 
-    c = canvas.Canvas(output_pdf, pagesize=A4)
+    if drawable_count == 0:
+        diagnostics.append(_diagnostic(None, None, "error", "No drawable notes found."))
+    return diagnostics
+
+
+def format_diagnostic(diagnostic):
+    location = []
+    if diagnostic["voice"] is not None:
+        location.append(f"voice {diagnostic['voice']}")
+    if diagnostic["event_index"] is not None:
+        location.append(f"event {diagnostic['event_index']:03d}")
+    prefix = f"[{', '.join(location)}] " if location else ""
+    return f"{diagnostic['severity']}: {prefix}{diagnostic['message']}"
+
+
+def _note_x_positions(note_count, left_x, right_x):
+    if note_count <= 1:
+        return [(left_x + right_x) / 2]
+    note_spacing = (right_x - left_x) / (note_count - 1)
+    return [left_x + i * note_spacing for i in range(note_count)]
+
+
+def compute_voice_layout_scalar(string_numbers, left_x, right_x, string_y, endpoint_gap):
+    # Connector endpoints and midpoints are returned as flat columns, entry i belongs to notes i and i + 1.
+    xs = _note_x_positions(len(string_numbers), left_x, right_x)
+    ys = [string_y[string_number] for string_number in string_numbers]
+    start_xs, start_ys, end_xs, end_ys, visible = [], [], [], [], []
+    mid_xs, mid_ys = [], []
+    for x1, y1, x2, y2 in zip(xs, ys, xs[1:], ys[1:]):
+        dx = x2 - x1
+        dy = y2 - y1
+        length = math.hypot(dx, dy)
+        if length <= 2 * endpoint_gap:
+            start_xs.append(x1)
+            start_ys.append(y1)
+            end_xs.append(x2)
+            end_ys.append(y2)
+            visible.append(False)
+        else:
+            ux = dx / length
+            uy = dy / length
+            start_xs.append(x1 + ux * endpoint_gap)
+            start_ys.append(y1 + uy * endpoint_gap)
+            end_xs.append(x2 - ux * endpoint_gap)
+            end_ys.append(y2 - uy * endpoint_gap)
+            visible.append(True)
+        mid_xs.append((x1 + x2) / 2)
+        mid_ys.append((y1 + y2) / 2)
+    return {
+        "x": xs,
+        "y": ys,
+        "connectors": (start_xs, start_ys, end_xs, end_ys),
+        "connector_visible": visible,
+        "midpoints": (mid_xs, mid_ys),
+    }
+
+
+def compute_voice_layout_vectorized(string_numbers, left_x, right_x, string_y, endpoint_gap):
+    # Same arithmetic as compute_voice_layout_scalar, applied to whole arrays at once.
+    note_count = len(string_numbers)
+    if note_count <= 1:
+        xs = np.array([(left_x + right_x) / 2])
+    else:
+        note_spacing = (right_x - left_x) / (note_count - 1)
+        xs = left_x + np.arange(note_count) * note_spacing
+    ys = np.asarray(string_y)[np.asarray(string_numbers, dtype=np.intp)]
 
+    x1, y1, x2, y2 = xs[:-1], ys[:-1], xs[1:], ys[1:]
+    dx = x2 - x1
+    dy = y2 - y1
+    length = np.hypot(dx, dy)
+    visible = length > 2 * endpoint_gap
+    safe_length = np.where(visible, length, 1.0)
+    ux = dx / safe_length
+    uy = dy / safe_length
+    start_xs = np.where(visible, x1 + ux * endpoint_gap, x1)
+    start_ys = np.where(visible, y1 + uy * endpoint_gap, y1)
+    end_xs = np.where(visible, x2 - ux * endpoint_gap, x2)
+    end_ys = np.where(visible, y2 - uy * endpoint_gap, y2)
+    return {
+        "x": xs.tolist(),
+        "y": ys.tolist(),
+        "connectors": (start_xs.tolist(), start_ys.tolist(), end_xs.tolist(), end_ys.tolist()),
+        "connector_visible": visible.tolist(),
+        "midpoints": (((x1 + x2) / 2).tolist(), ((y1 + y2) / 2).tolist()),
+    }
+
+
+def compute_voice_layout(string_numbers, left_x, right_x, string_y, endpoint_gap, vectorized=None):
+    if vectorized is None:
+        vectorized = np is not None and len(string_numbers) >= VECTORIZED_LAYOUT_MIN_NOTES
+    if vectorized:
+        if np is None:
+            raise ValueError("The vectorized layout requires numpy to be installed.")
+        return compute_voice_layout_vectorized(string_numbers, left_x, right_x, string_y, endpoint_gap)
+    return compute_voice_layout_scalar(string_numbers, left_x, right_x, string_y, endpoint_gap)
+
+
+def render_pdf(
+    voice_melodies,
+    piece_name="",
+    rhythm="",
+    output_pdf=OUTPUT_PDF_FILE,
+    instrument=DEFAULT_INSTRUMENT_PROFILE,
+    vectorized=None,
+    render_date=None,
+    backend=DEFAULT_PDF_BACKEND,
+):
+    # A pinned render_date also makes reportlab omit timestamps and random IDs, so the output is byte-stable.
+    layout = get_instrument_layout(instrument)
+    c = create_canvas(output_pdf, layout["page_size"], backend, invariant=render_date is not None)
+    draw_sheet(c, voice_melodies, piece_name, rhythm, instrument, vectorized, render_date)
+    c.save()
+
+
+def create_canvas(output_pdf, pagesize, backend=DEFAULT_PDF_BACKEND, invariant=False):
+    pagesize = pagesize or A4
+    if backend == "direct":
+        return DirectCanvas(output_pdf, pagesize=pagesize)
+    if backend == "reportlab":
+        return canvas.Canvas(output_pdf, pagesize=pagesize, invariant=1 if invariant else None)
+    raise ValueError(f"Unknown PDF backend: {backend}")
+
+
+def draw_sheet(
+    c,
+    voice_melodies,
+    piece_name="",
+    rhythm="",
+    instrument=DEFAULT_INSTRUMENT_PROFILE,
+    vectorized=None,
+    render_date=None,
+):
+    # Draws one complete sheet onto the current page of the canvas.
+    layout = get_instrument_layout(instrument)
+    page_width = layout["page_width"]
+    page_height = layout["page_height"]
+    zither_strings = layout["strings"]
+    string_count = layout["string_count"]
+    string_y = layout["string_y"]
+    string_min_x = layout["string_min_x"]
+
+    c.setPageSize(layout["page_size"])
     c.setLineWidth(STRING_DRAW_WIDTH_MM * mm)
-    for i in range(string_count):
-        y = top_line_center_y - i * string_spacing
-        if i == string_count - 1:
+    for string_number in range(string_count, 0, -1):
+        y = string_y[string_number]
+        if string_number == 1:
             c.setStrokeColor(colors.black)
         else:
             c.setStrokeColor(colors.lightgrey)
-        c.line(SIDE_MARGIN, y, PAGE_WIDTH - SIDE_MARGIN, y)
+        c.line(SIDE_MARGIN, y, page_width - SIDE_MARGIN, y)
     c.setStrokeColor(colors.black)
     c.setLineWidth(1)
 
-    label_x = PAGE_WIDTH - SIDE_MARGIN + (STRING_LABEL_GAP_MM * mm)
+    label_x = page_width - SIDE_MARGIN + (STRING_LABEL_GAP_MM * mm)
     c.setFont("Helvetica", STRING_LABEL_FONT_SIZE)
-    for note_name, string_number in ZITHER_STRINGS.items():
-        y = top_line_center_y - (string_count - string_number) * string_spacing
+    for note_name, string_number in zither_strings.items():
+        y = string_y[string_number]
         c.saveState()
         c.translate(label_x, y)
         c.rotate(90)
         c.drawString(0, -(STRING_LABEL_FONT_SIZE * 0.35), note_name)
         c.restoreState()
 
-    c1_y = top_line_center_y - (string_count - ZITHER_STRINGS["c1"]) * string_spacing
+    c1_y = string_y[zither_strings["c1"]]
     c1_notice_y = c1_y - (3.2 * mm)
     c.saveState()
-    c.translate(PAGE_WIDTH / 2, c1_notice_y)
+    c.translate(page_width / 2, c1_notice_y)
     c.rotate(180)
     c.setFillColor(colors.black)
     c.setFont("Helvetica", C1_NOTICE_FONT_SIZE)
@@ -386,14 +690,14 @@ def render_pdf(voice_melodies, piece_name="", rhythm="", output_pdf=OUTPUT_PDF_F
     rhythm_text = rhythm.strip() if rhythm else ""
     if rhythm_text:
         c.saveState()
-        c.translate(PAGE_WIDTH / 2, c1_notice_y - (4.2 * mm))
+        c.translate(page_width / 2, c1_notice_y - (4.2 * mm))
         c.rotate(180)
         c.setFillColor(colors.black)
         c.setFont("Helvetica-Bold", RHYTHM_FONT_SIZE)
         c.drawCentredString(0, 0, f"Rhythm: {rhythm_text}")
         c.restoreState()
 
-    note_radius = 5
+    note_radius = NOTE_RADIUS
     duration_fill = {
         "whole": 1.0,
         "half": 0.5,
@@ -404,34 +708,30 @@ def render_pdf(voice_melodies, piece_name="", rhythm="", output_pdf=OUTPUT_PDF_F
 
     drawable_notes_by_voice = {}
     for voice_id, melody_entries in voice_melodies.items():
-        voice_drawable = build_drawable_notes(melody_entries)
+        voice_drawable = build_drawable_notes(melody_entries, zither_strings, layout["chord_count"])
         if voice_drawable:
             drawable_notes_by_voice[voice_id] = voice_drawable
 
     if not drawable_notes_by_voice:
         raise ValueError("No drawable notes found.")
 
-    base_left_x = SIDE_MARGIN + NOTE_SIDE_PADDING
-    right_x = PAGE_WIDTH - SIDE_MARGIN - NOTE_SIDE_PADDING
-    required_left_x = base_left_x
+    right_x = layout["right_x"]
+    required_left_x = layout["base_left_x"]
 
-    for voice_notes in drawable_notes_by_voice.values():
-        for note_name, _, _, _, _, _ in voice_notes:
-            string_number = ZITHER_STRINGS[note_name]
-            y = top_line_center_y - (string_count - string_number) * string_spacing
-            required_left_x = max(required_left_x, min_x_outside_cutout(y, base_left_x, note_radius))
+    string_numbers_by_voice = {}
+    for voice_id, voice_notes in drawable_notes_by_voice.items():
+        string_numbers = [zither_strings[note[0]] for note in voice_notes]
+        string_numbers_by_voice[voice_id] = string_numbers
+        required_left_x = max(required_left_x, max(string_min_x[string_number] for string_number in set(string_numbers)))
 
     left_x = min(required_left_x, right_x)
+    connector_endpoint_gap = note_radius + (NOTE_MASK_PADDING_MM * mm)
 
-    voice_count = len(drawable_notes_by_voice)
     for voice_index, voice_id in enumerate(sorted(drawable_notes_by_voice.keys(), key=_voice_sort_key)):
         drawable_notes = drawable_notes_by_voice[voice_id]
-        note_count = len(drawable_notes)
-        if note_count <= 1:
-            note_positions = [(left_x + right_x) / 2]
-        else:
-            note_spacing = (right_x - left_x) / (note_count - 1)
-            note_positions = [left_x + i * note_spacing for i in range(note_count)]
+        voice_layout = compute_voice_layout(
+            string_numbers_by_voice[voice_id], left_x, right_x, string_y, connector_endpoint_gap, vectorized
+        )
 
         if voice_index == 0:
             voice_color = colors.black
@@ -441,14 +741,12 @@ def render_pdf(voice_melodies, piece_name="", rhythm="", output_pdf=OUTPUT_PDF_F
         c.setStrokeColor(voice_color)
         c.setFillColor(voice_color)
 
-        prev_x = None
-        prev_y = None
-        connector_endpoint_gap = note_radius + (NOTE_MASK_PADDING_MM * mm)
-        for x_position, (note_name, duration, dotted, rest_before, between_chords, chord_with_note) in zip(
-            note_positions, drawable_notes
+        start_xs, start_ys, end_xs, end_ys = voice_layout["connectors"]
+        connector_visible = voice_layout["connector_visible"]
+        mid_xs, mid_ys = voice_layout["midpoints"]
+        for i, (x_position, y, (_, duration, dotted, rest_before, between_chords, chord_with_note)) in enumerate(
+            zip(voice_layout["x"], voice_layout["y"], drawable_notes)
         ):
-            string_number = ZITHER_STRINGS[note_name]
-            y = top_line_center_y - (string_count - string_number) * string_spacing
             fill_fraction = duration_fill.get(duration, 1.0)
             draw_note_head(c, x_position, y, note_radius, fill_fraction)
             dot_drawn = False
@@ -458,31 +756,31 @@ def render_pdf(voice_melodies, piece_name="", rhythm="", output_pdf=OUTPUT_PDF_F
             if chord_with_note is not None:
                 chord_extra_offset = CHORD_WITH_DOT_EXTRA_OFFSET_MM if dot_drawn else 0.0
                 draw_chord_on_note(c, x_position, y, note_radius, chord_with_note, chord_extra_offset)
-            if prev_x is not None:
-                draw_connector_line(c, prev_x, prev_y, x_position, y, connector_endpoint_gap)
+            if i > 0:
+                j = i - 1
+                if connector_visible[j]:
+                    c.line(start_xs[j], start_ys[j], end_xs[j], end_ys[j])
                 if rest_before in {"whole", "half", "quarter"}:
-                    draw_rest_symbol(c, prev_x, prev_y, x_position, y, rest_before)
+                    draw_rest_symbol_at(c, mid_xs[j], mid_ys[j], rest_before)
                 if between_chords:
-                    draw_chords_between_notes(c, prev_x, prev_y, x_position, y, between_chords)
-            prev_x = x_position
-            prev_y = y
+                    draw_chords_between_notes_at(c, mid_xs[j], mid_ys[j], between_chords)
 
         c.restoreState()
 
     c.setStrokeColor(colors.black)
     cut_x1 = 0
-    cut_y1 = PAGE_HEIGHT - (CUT_LEFT_EDGE_MM * mm)
+    cut_y1 = page_height - (CUT_LEFT_EDGE_MM * mm)
     cut_x2 = CUT_TOP_EDGE_MM * mm
-    cut_y2 = PAGE_HEIGHT
+    cut_y2 = page_height
     c.line(cut_x1, cut_y1, cut_x2, cut_y2)
     draw_cut_label(c, cut_x1, cut_y1, cut_x2, cut_y2)
 
     # Piece title + date upside down at the very bottom of the page.
     title_text = piece_name.strip() or "Untitled Piece"
-    date_text = date.today().strftime("%d.%m.%Y")
+    date_text = (render_date or date.today()).strftime("%d.%m.%Y")
     title_center_y = c1_notice_y / 2
     c.saveState()
-    c.translate(PAGE_WIDTH / 2, title_center_y)
+    c.translate(page_width / 2, title_center_y)
     c.rotate(180)
     c.setFillColor(colors.black)
     c.setStrokeColor(colors.black)
@@ -495,54 +793,72 @@ def render_pdf(voice_melodies, piece_name="", rhythm="", output_pdf=OUTPUT_PDF_F
     c.drawCentredString(0, -6 * mm, date_text)
     c.restoreState()
 
-    c.save()
-
 
-def serialize_project_data(voice_melodies, piece_name, rhythm):
+def serialize_project_data(voice_melodies, piece_name, rhythm, instrument=DEFAULT_INSTRUMENT_PROFILE):
     return {
         "piece_name": piece_name,
         "rhythm": rhythm,
+        "instrument": instrument,
         "voices": {voice_id: [list(event) for event in events] for voice_id, events in voice_melodies.items()}
     }
 
 
-def save_project_data(voice_melodies, piece_name, rhythm, output_path=INPUT_MELODY_FILE):
-    data = serialize_project_data(voice_melodies, piece_name, rhythm)
+def save_project_data(
+    voice_melodies, piece_name, rhythm, output_path=INPUT_MELODY_FILE, instrument=DEFAULT_INSTRUMENT_PROFILE
+):
+    data = serialize_project_data(voice_melodies, piece_name, rhythm, instrument)
     output_path.write_text(json.dumps(data, indent=2), encoding="utf-8")
 
 
 def load_project_data(input_path=INPUT_MELODY_FILE):
     if not input_path.exists():
-        return {"1": []}, "", ""
+        return {"1": []}, "", "", DEFAULT_INSTRUMENT_PROFILE
+
+    return parse_project_data(json.loads(input_path.read_text(encoding="utf-8")))
+
 
-    data = json.loads(input_path.read_text(encoding="utf-8"))
+def parse_project_data(data):
     voices = data.get("voices", {})
     piece_name = str(data.get("piece_name", "")).strip()
     rhythm = str(data.get("rhythm", "")).strip()
+    instrument = str(data.get("instrument", DEFAULT_INSTRUMENT_PROFILE)).strip()
+    if instrument not in INSTRUMENT_PROFILES:
+        instrument = DEFAULT_INSTRUMENT_PROFILE
     parsed = {}
     for voice_id, events in voices.items():
         parsed[str(voice_id)] = [tuple(event) for event in events]
-    return (parsed or {"1": []}), piece_name, rhythm
+    return (parsed or {"1": []}), piece_name, rhythm, instrument
 
 
-def format_event(event):
+def collect_project_paths(sources):
+    project_paths = []
+    for source in sources:
+        source = Path(source)
+        if source.is_dir():
+            project_paths.extend(sorted(source.rglob("*.json")))
+        else:
+            project_paths.append(source)
+    return project_paths
+
+
+def format_event(event, chord_count=6):
     if len(event) == 2 and str(event[0]).lower() == "chord":
-        chord_number, string_count = _parse_chord_spec(event[1])
+        chord_number, string_count = _parse_chord_spec(event[1], chord_count)
         return f"chord {_chord_label(chord_number, string_count)} (between)"
     if len(event) == 3 and str(event[0]).lower() == "chord":
-        chord_number, string_count = _parse_chord_spec(event[1:3])
+        chord_number, string_count = _parse_chord_spec(event[1:3], chord_count)
         return f"chord {_chord_label(chord_number, string_count)} (between)"
     if len(event) == 2 and str(event[0]).lower() == "rest":
         return f"rest {event[1]}"
     if len(event) == 3:
         if isinstance(event[2], bool):
             return f"{event[0]} {event[1]} dotted"
-        chord_number, string_count = _parse_chord_spec(event[2])
+        chord_number, string_count = _parse_chord_spec(event[2], chord_count)
         return f"{event[0]} {event[1]} chord:{_chord_label(chord_number, string_count)}"
     if len(event) == 4:
         chord_text = ""
         if event[3] is not None:
-            chord_number, string_count = _parse_chord_spec(event[3])
+            chord_number, string_count = _parse_chord_spec(event[3], chord_count)
             chord_text = f" chord:{_chord_label(chord_number, string_count)}"
         dotted_text = " dotted" if bool(event[2]) else ""
         return f"{event[0]} {event[1]}{dotted_text}{chord_text}"
@@ -550,7 +866,7 @@ def format_event(event):
 
 
 def run_gui():
-    voice_melodies, initial_piece_name, initial_rhythm = load_project_data()
+    voice_melodies, initial_piece_name, initial_rhythm, initial_instrument = load_project_data()
 
     root = tk.Tk()
     root.title("Zither Melody Editor")
@@ -575,6 +891,17 @@ def run_gui():
     )
     rhythm_box.grid(row=1, column=6, padx=(0, 10), sticky="w")
 
+    ttk.Label(control_frame, text="Instrument").grid(row=2, column=6, sticky="w")
+    instrument_var = tk.StringVar(value=initial_instrument)
+    instrument_box = ttk.Combobox(
+        control_frame,
+        textvariable=instrument_var,
+        values=INSTRUMENT_OPTIONS,
+        width=10,
+        state="readonly",
+    )
+    instrument_box.grid(row=3, column=6, padx=(0, 10), sticky="w")
+
     ttk.Label(control_frame, text="Output PDF").grid(row=2, column=0, sticky="w")
     output_pdf_var = tk.StringVar(value=OUTPUT_PDF_FILE)
     output_pdf_entry = ttk.Entry(control_frame, textvariable=output_pdf_var, width=34)
@@ -592,6 +919,11 @@ def run_gui():
 
     ttk.Button(control_frame, text="Browse...", command=choose_output_pdf).grid(row=3, column=1, sticky="w")
 
+    # Project file that "Write + Generate PDF" saves to; pieces opened from the library are saved in place.
+    project_file_var = tk.StringVar(value=str(INPUT_MELODY_FILE))
+    ttk.Label(control_frame, text="Project file").grid(row=4, column=0, sticky="w", pady=(8, 0))
+    ttk.Label(control_frame, textvariable=project_file_var).grid(row=5, column=0, columnspan=7, sticky="w")
+
     ttk.Label(control_frame, text="Voice").grid(row=0, column=1, sticky="w")
     voice_var = tk.StringVar(value="1")
     voice_spin = ttk.Spinbox(control_frame, from_=1, to=8, textvariable=voice_var, width=8)
@@ -609,11 +941,12 @@ def run_gui():
     event_type_box.grid(row=1, column=2, padx=(0, 10), sticky="w")
 
     ttk.Label(control_frame, text="Note").grid(row=0, column=3, sticky="w")
-    note_var = tk.StringVar(value=next(iter(ZITHER_STRINGS.keys())))
+    initial_strings = get_instrument_layout(initial_instrument)["strings"]
+    note_var = tk.StringVar(value=next(iter(initial_strings.keys())))
     note_box = ttk.Combobox(
         control_frame,
         textvariable=note_var,
-        values=list(ZITHER_STRINGS.keys()),
+        values=list(initial_strings.keys()),
         width=10,
         state="readonly",
     )
@@ -624,7 +957,7 @@ def run_gui():
     chord_box = ttk.Combobox(
         control_frame,
         textvariable=chord_var,
-        values=CHORD_OPTIONS,
+        values=get_instrument_layout(initial_instrument)["chord_options"],
         width=10,
         state="readonly",
     )
@@ -646,7 +979,7 @@ def run_gui():
     between_chord_box = ttk.Combobox(
         control_frame,
         textvariable=between_chord_var,
-        values=CHORD_OPTIONS,
+        values=get_instrument_layout(initial_instrument)["chord_options"],
         width=10,
         state="readonly",
     )
@@ -683,10 +1016,17 @@ def run_gui():
     def refresh_event_list():
         event_list.delete(0, tk.END)
         total = 0
+        instrument = instrument_var.get()
+        chord_count = get_instrument_layout(instrument)["chord_count"]
         for voice_id in sorted(voice_melodies.keys(), key=_voice_sort_key):
             event_list.insert(tk.END, f"Voice {voice_id}")
             for idx, event in enumerate(voice_melodies[voice_id], start=1):
-                event_list.insert(tk.END, f"  {idx:03d}. {format_event(event)}")
+                try:
+                    event_text = format_event(event, chord_count)
+                except (TypeError, ValueError):
+                    # E.g. chord 6 after switching to an instrument with five chord bars.
+                    event_text = f"{event!r} (not valid for {instrument})"
+                event_list.insert(tk.END, f"  {idx:03d}. {event_text}")
                 total += 1
         if total == 0:
             event_list.insert(tk.END, "(no events yet)")
@@ -706,6 +1046,20 @@ def run_gui():
 
     event_type_var.trace_add("write", on_event_type_change)
 
+    def on_instrument_change(*_):
+        layout = get_instrument_layout(instrument_var.get())
+        zither_strings = layout["strings"]
+        note_box.configure(values=list(zither_strings.keys()))
+        if note_var.get() not in zither_strings:
+            note_var.set(next(iter(zither_strings.keys())))
+        for box, var in ((chord_box, chord_var), (between_chord_box, between_chord_var)):
+            box.configure(values=layout["chord_options"])
+            if var.get() not in layout["chord_options"]:
+                var.set("none")
+        refresh_event_list()
+
+    instrument_var.trace_add("write", on_instrument_change)
+
     def add_event():
         voice_id = voice_var.get().strip() or "1"
         voice_melodies.setdefault(voice_id, [])
@@ -720,12 +1074,13 @@ def run_gui():
             voice_melodies[voice_id].append(("rest", duration))
         else:
             note = note_var.get().strip().lower()
-            if note not in ZITHER_STRINGS:
+            if note not in get_instrument_layout(instrument_var.get())["strings"]:
                 messagebox.showerror("Invalid note", "Please select a note from the list.")
                 return
 
+            chord_numbers = get_instrument_layout(instrument_var.get())["chord_options"][1:]
             between_chord_text = between_chord_var.get().strip()
-            if between_chord_text in {"1", "2", "3", "4", "5", "6"}:
+            if between_chord_text in chord_numbers:
                 has_prior_note = any(
                     isinstance(ev, tuple) and len(ev) >= 2 and str(ev[0]).lower() not in {"rest", "chord"}
                     for ev in voice_melodies[voice_id]
@@ -737,7 +1092,7 @@ def run_gui():
                     between_chord_var.set("none")
 
             chord_with_note = None
-            if chord_var.get().strip() in {"1", "2", "3", "4", "5", "6"}:
+            if chord_var.get().strip() in chord_numbers:
                 chord_with_note = _serialize_chord_spec(int(chord_var.get().strip()), int(chord_strings_var.get().strip()))
             if dotted_var.get():
                 voice_melodies[voice_id].append((note, duration, True, chord_with_note))
@@ -753,8 +1108,9 @@ def run_gui():
         voice_id = voice_var.get().strip() or "1"
         voice_melodies.setdefault(voice_id, [])
         chord_text = between_chord_var.get().strip()
-        if chord_text not in {"1", "2", "3", "4", "5", "6"}:
-            messagebox.showerror("Invalid chord", "Please select a between-chord number (1..6).")
+        layout = get_instrument_layout(instrument_var.get())
+        if chord_text not in layout["chord_options"][1:]:
+            messagebox.showerror("Invalid chord", f"Please select a between-chord number (1..{layout['chord_count']}).")
             return
         chord_strings = int(chord_strings_var.get().strip())
         chord_spec = _serialize_chord_spec(int(chord_text), chord_strings)
@@ -774,17 +1130,21 @@ def run_gui():
         refresh_event_list()
 
     def clear_all():
+        # A cleared sheet is a new piece and must not overwrite a project opened from the library.
+        project_file_var.set(str(INPUT_MELODY_FILE))
         for voice_id in list(voice_melodies.keys()):
             voice_melodies[voice_id] = []
         refresh_event_list()
 
     def clear_json_file():
         try:
+            project_file_var.set(str(INPUT_MELODY_FILE))
             save_project_data({"1": []}, "", "", INPUT_MELODY_FILE)
             voice_melodies.clear()
             voice_melodies["1"] = []
             piece_name_var.set("")
             rhythm_var.set("4/4")
+            instrument_var.set(DEFAULT_INSTRUMENT_PROFILE)
             refresh_event_list()
             messagebox.showinfo("Success", f"Cleared {INPUT_MELODY_FILE.name}.")
         except Exception as exc:
@@ -794,24 +1154,55 @@ def run_gui():
         try:
             piece_name = piece_name_var.get().strip()
             rhythm = rhythm_var.get().strip()
-            save_project_data(voice_melodies, piece_name, rhythm, INPUT_MELODY_FILE)
+            instrument = instrument_var.get()
+            project_file = Path(project_file_var.get())
+            save_project_data(voice_melodies, piece_name, rhythm, project_file, instrument)
             output_pdf = output_pdf_var.get().strip() or OUTPUT_PDF_FILE
             if not output_pdf.lower().endswith(".pdf"):
                 output_pdf += ".pdf"
                 output_pdf_var.set(output_pdf)
-            render_pdf(voice_melodies, piece_name, rhythm, output_pdf)
+            errors = [
+                format_diagnostic(diagnostic)
+                for diagnostic in validate_project(voice_melodies, instrument)
+                if diagnostic["severity"] == "error"
+            ]
+            if errors:
+                messagebox.showerror("Invalid project", "\n".join(errors[:15]))
+                return
+            render_pdf(voice_melodies, piece_name, rhythm, output_pdf, instrument)
             messagebox.showinfo(
                 "Success",
-                f"Saved notes to {INPUT_MELODY_FILE.name} and generated {output_pdf} with today's date.",
+                f"Saved notes to {project_file.name} and generated {output_pdf} with today's date.",
             )
         except Exception as exc:
             messagebox.showerror("Error", str(exc))
 
+    def open_project_file(project_file):
+        try:
+            loaded_melodies, piece_name, rhythm, instrument = load_project_data(project_file)
+        except Exception as exc:
+            messagebox.showerror("Error", str(exc))
+            return
+        voice_melodies.clear()
+        voice_melodies.update(loaded_melodies)
+        piece_name_var.set(piece_name)
+        rhythm_var.set(rhythm or "4/4")
+        instrument_var.set(instrument)
+        project_file_var.set(str(project_file))
+        refresh_event_list()
+
+    def open_library():
+        # Imported here because library.py builds on this module.
+        from library import open_library_window
+
+        open_library_window(root, open_project_file)
+
     ttk.Button(button_frame, text="Add Event", command=add_event).pack(side="left", padx=(0, 8))
     ttk.Button(button_frame, text="Undo Last", command=undo_last).pack(side="left", padx=(0, 8))
     ttk.Button(button_frame, text="Clear Voice", command=clear_voice).pack(side="left", padx=(0, 8))
     ttk.Button(button_frame, text="Clear All", command=clear_all).pack(side="left", padx=(0, 8))
     ttk.Button(button_frame, text="Clear JSON", command=clear_json_file).pack(side="left", padx=(0, 8))
+    ttk.Button(button_frame, text="Library...", command=open_library).pack(side="left", padx=(0, 8))
     ttk.Button(button_frame, text="Write + Generate PDF", command=write_and_generate_pdf).pack(side="right")
 
     on_event_type_change()
@@ -0,0 +1,223 @@
+import math
+import zlib
+
+from reportlab.pdfbase.pdfmetrics import stringWidth
+
+# ---- Konfiguration ----
+
+# Bezier control point distance for a quarter circle.
+CIRCLE_KAPPA = 0.5522847498
+# The twelve base-14 text fonts. Symbol and ZapfDingbats are left out because text is written as WinAnsi (cp1252).
+BASE14_TEXT_FONTS = {
+    "Courier",
+    "Courier-Bold",
+    "Courier-BoldOblique",
+    "Courier-Oblique",
+    "Helvetica",
+    "Helvetica-Bold",
+    "Helvetica-BoldOblique",
+    "Helvetica-Oblique",
+    "Times-Bold",
+    "Times-BoldItalic",
+    "Times-Italic",
+    "Times-Roman",
+}
+
+
+def _escape_text(text):
+    encoded = text.encode("cp1252", errors="replace")
+    return encoded.replace(b"\\", b"\\\\").replace(b"(", b"\\(").replace(b")", b"\\)").decode("latin-1")
+
+
+def _arc_segments(cx, cy, radius, start_deg, extent_deg):
+    # Splits the arc into pieces of at most 90 degrees and yields their Bezier control points.
+    segment_count = max(1, math.ceil(abs(extent_deg) / 90))
+    step = math.radians(extent_deg) / segment_count
+    handle = (4 / 3) * math.tan(step / 4) * radius
+    angle = math.radians(start_deg)
+    for _ in range(segment_count):
+        cos0, sin0 = math.cos(angle), math.sin(angle)
+        angle += step
+        cos1, sin1 = math.cos(angle), math.sin(angle)
+        yield (
+            cx + radius * cos0 - handle * sin0,
+            cy + radius * sin0 + handle * cos0,
+            cx + radius * cos1 + handle * sin1,
+            cy + radius * sin1 - handle * cos1,
+            cx + radius * cos1,
+            cy + radius * sin1,
+        )
+
+
+# Writes the primitives of the zither sheet straight into PDF content streams. Implements the subset of
+# reportlab's canvas API that draw_sheet needs, with base-14 text fonts only (nothing is embedded). The output
+# contains no timestamps or random IDs and is therefore always byte-stable.
+class DirectCanvas:
+    def __init__(self, filename, pagesize=(595.2756, 841.8898), page_compression=True):
+        self._filename = filename
+        self._page_size = tuple(pagesize)
+        self._page_compression = page_compression
+        self._pages = []
+        self._ops = []
+        self._font = ("Helvetica", 12)
+        self._font_stack = []
+        self._font_ids = {}
+
+    # ---- Graphics state ----
+
+    def setPageSize(self, pagesize):
+        self._page_size = tuple(pagesize)
+
+    def saveState(self):
+        self._ops.append("q\n")
+        self._font_stack.append(self._font)
+
+    def restoreState(self):
+        self._ops.append("Q\n")
+        self._font = self._font_stack.pop()
+
+    def translate(self, dx, dy):
+        self._ops.append("1 0 0 1 %.4f %.4f cm\n" % (dx, dy))
+
+    def rotate(self, theta):
+        if theta == 90:
+            self._ops.append("0 1 -1 0 0 0 cm\n")
+        elif theta == 180:
+            self._ops.append("-1 0 0 -1 0 0 cm\n")
+        else:
+            radians = math.radians(theta)
+            cos, sin = math.cos(radians), math.sin(radians)
+            self._ops.append("%.6f %.6f %.6f %.6f 0 0 cm\n" % (cos, sin, -sin, cos))
+
+    def setLineWidth(self, width):
+        self._ops.append("%.4f w\n" % width)
+
+    def setStrokeColor(self, color):
+        self._ops.append("%.4f %.4f %.4f RG\n" % (color.red, color.green, color.blue))
+
+    def setFillColor(self, color):
+        self._ops.append("%.4f %.4f %.4f rg\n" % (color.red, color.green, color.blue))
+
+    def setFont(self, psfontname, size):
+        if psfontname not in BASE14_TEXT_FONTS:
+            raise ValueError(f"DirectCanvas only supports base-14 text fonts, not {psfontname}.")
+        self._font = (psfontname, size)
+
+    # ---- Primitives ----
+
+    @staticmethod
+    def _paint_operator(stroke, fill):
+        if stroke and fill:
+            return "B"
+        if fill:
+            return "f"
+        if stroke:
+            return "S"
+        return "n"
+
+    def line(self, x1, y1, x2, y2):
+        self._ops.append("%.4f %.4f m %.4f %.4f l S\n" % (x1, y1, x2, y2))
+
+    def rect(self, x, y, width, height, stroke=1, fill=0):
+        self._ops.append("%.4f %.4f %.4f %.4f re %s\n" % (x, y, width, height, self._paint_operator(stroke, fill)))
+
+    def circle(self, x_cen, y_cen, r, stroke=1, fill=0):
+        k = CIRCLE_KAPPA * r
+        self._ops.append(
+            "%.4f %.4f m "
+            "%.4f %.4f %.4f %.4f %.4f %.4f c "
+            "%.4f %.4f %.4f %.4f %.4f %.4f c "
+            "%.4f %.4f %.4f %.4f %.4f %.4f c "
+            "%.4f %.4f %.4f %.4f %.4f %.4f c h %s\n"
+            % (
+                x_cen + r, y_cen,
+                x_cen + r, y_cen + k, x_cen + k, y_cen + r, x_cen, y_cen + r,
+                x_cen - k, y_cen + r, x_cen - r, y_cen + k, x_cen - r, y_cen,
+                x_cen - r, y_cen - k, x_cen - k, y_cen - r, x_cen, y_cen - r,
+                x_cen + k, y_cen - r, x_cen + r, y_cen - k, x_cen + r, y_cen,
+                self._paint_operator(stroke, fill),
+            )
+        )
+
+    def wedge(self, x1, y1, x2, y2, startAng, extent, stroke=1, fill=0):
+        # Only circular wedges are needed for note heads.
+        cx, cy = (x1 + x2) / 2, (y1 + y2) / 2
+        radius = (x2 - x1) / 2
+        start = math.radians(startAng)
+        parts = [
+            "%.4f %.4f m %.4f %.4f l " % (cx, cy, cx + radius * math.cos(start), cy + radius * math.sin(start))
+        ]
+        for segment in _arc_segments(cx, cy, radius, startAng, extent):
+            parts.append("%.4f %.4f %.4f %.4f %.4f %.4f c " % segment)
+        parts.append("h %s\n" % self._paint_operator(stroke, fill))
+        self._ops.append("".join(parts))
+
+    def stringWidth(self, text, fontName=None, fontSize=None):
+        return stringWidth(text, fontName or self._font[0], fontSize or self._font[1])
+
+    def drawString(self, x, y, text):
+        font_name, font_size = self._font
+        font_id = self._font_ids.setdefault(font_name, len(self._font_ids) + 1)
+        self._ops.append("BT /F%d %.4f Tf %.4f %.4f Td (%s) Tj ET\n" % (font_id, font_size, x, y, _escape_text(text)))
+
+    def drawCentredString(self, x, y, text):
+        self.drawString(x - self.stringWidth(text) / 2, y, text)
+
+    # ---- Document ----
+
+    def showPage(self):
+        self._pages.append((self._page_size, "".join(self._ops).encode("latin-1")))
+        self._ops = []
+        self._font = ("Helvetica", 12)
+        self._font_stack = []
+
+    def save(self):
+        if self._ops or not self._pages:
+            self.showPage()
+
+        font_count = len(self._font_ids)
+        first_page_number = 3 + font_count
+        objects = [
+            b"<< /Type /Catalog /Pages 2 0 R >>",
+            b"<< /Type /Pages /Kids [%s] /Count %d >>"
+            % (
+                b" ".join(b"%d 0 R" % (first_page_number + 2 * i) for i in range(len(self._pages))),
+                len(self._pages),
+            ),
+        ]
+        for font_name in self._font_ids:
+            objects.append(
+                b"<< /Type /Font /Subtype /Type1 /BaseFont /%s /Encoding /WinAnsiEncoding >>" % font_name.encode("ascii")
+            )
+        font_resources = b" ".join(b"/F%d %d 0 R" % (font_id, 2 + font_id) for font_id in self._font_ids.values())
+        for index, ((page_width, page_height), content) in enumerate(self._pages):
+            content_number = first_page_number + 2 * index + 1
+            objects.append(
+                b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 %.4f %.4f] /Resources << /Font << %s >> >> "
+                b"/Contents %d 0 R >>" % (page_width, page_height, font_resources, content_number)
+            )
+            if self._page_compression:
+                content = zlib.compress(content)
+                objects.append(b"<< /Length %d /Filter /FlateDecode >>\nstream\n%s\nendstream" % (len(content), content))
+            else:
+                objects.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(content), content))
+
+        chunks = [b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n"]
+        offsets = []
+        position = len(chunks[0])
+        for number, body in enumerate(objects, start=1):
+            chunk = b"%d 0 obj\n%s\nendobj\n" % (number, body)
+            offsets.append(position)
+            chunks.append(chunk)
+            position += len(chunk)
+        xref = [b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)]
+        xref.extend(b"%010d 00000 n \n" % offset for offset in offsets)
+        chunks.append(b"".join(xref))
+        chunks.append(b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, position))
+        data = b"".join(chunks)
+
+        if hasattr(self._filename, "write"):
+            self._filename.write(data)
+        else:
+            with open(self._filename, "wb") as handle:
+                handle.write(data)
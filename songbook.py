@@ -0,0 +1,133 @@
+import argparse
+import io
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+from pathlib import Path
+
+from main import (
+    DEFAULT_PDF_BACKEND,
+    PDF_BACKENDS,
+    collect_project_paths,
+    create_canvas,
+    draw_sheet,
+    format_diagnostic,
+    load_project_data,
+)
+from validator import invalid_projects, validate_projects
+
+try:
+    from pypdf import PdfReader, PdfWriter
+except ImportError:  # pypdf is optional; it is only needed to merge songbooks with more than one fragment.
+    PdfReader = PdfWriter = None
+
+# ---- Konfiguration ----
+
+# Fixed fragment size, so the merged PDF does not depend on the number of worker processes.
+PAGES_PER_FRAGMENT = 16
+MAX_REPORTED_ERRORS = 20
+
+
+def render_fragment(project_paths, render_date, vectorized=None, backend=DEFAULT_PDF_BACKEND):
+    # Renders a contiguous page range (one project per page) into an in-memory PDF.
+    buffer = io.BytesIO()
+    c = create_canvas(buffer, None, backend, invariant=True)
+    for project_path in project_paths:
+        voice_melodies, piece_name, rhythm, instrument = load_project_data(Path(project_path))
+        try:
+            draw_sheet(c, voice_melodies, piece_name, rhythm, instrument, vectorized, render_date)
+        except ValueError as exc:
+            raise ValueError(f"{project_path}: {exc}") from exc
+        c.showPage()
+    c.save()
+    return buffer.getvalue()
+
+
+def _render_fragment_job(job):
+    return render_fragment(*job)
+
+
+def merge_fragments(fragments, output_pdf):
+    if len(fragments) == 1:
+        Path(output_pdf).write_bytes(fragments[0])
+        return
+    if PdfWriter is None:
+        raise ValueError("Merging songbook fragments requires pypdf to be installed.")
+    writer = PdfWriter()
+    for fragment in fragments:
+        writer.append(PdfReader(io.BytesIO(fragment)))
+    with open(output_pdf, "wb") as handle:
+        writer.write(handle)
+
+
+def render_songbook(
+    project_paths,
+    output_pdf,
+    workers=None,
+    render_date=None,
+    pages_per_fragment=PAGES_PER_FRAGMENT,
+    vectorized=None,
+    validate=True,
+    backend=DEFAULT_PDF_BACKEND,
+):
+    project_paths = [str(path) for path in project_paths]
+    if not project_paths:
+        raise ValueError("No projects to render.")
+    if validate:
+        results = validate_projects(project_paths, workers)
+        invalid_paths = invalid_projects(results)
+        if invalid_paths:
+            errors = [
+                f"{path}: {format_diagnostic(diagnostic)}"
+                for path in invalid_paths
+                for diagnostic in results[path]
+                if diagnostic["severity"] == "error"
+            ]
+            raise ValueError(
+                f"{len(invalid_paths)} of {len(project_paths)} projects are invalid:\n"
+                + "\n".join(errors[:MAX_REPORTED_ERRORS])
+            )
+    render_date = render_date or date.today()
+    jobs = [
+        (project_paths[start:start + pages_per_fragment], render_date, vectorized, backend)
+        for start in range(0, len(project_paths), pages_per_fragment)
+    ]
+    workers = min(workers or os.cpu_count() or 1, len(jobs))
+    if workers <= 1:
+        fragments = [_render_fragment_job(job) for job in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            fragments = list(executor.map(_render_fragment_job, jobs))
+    merge_fragments(fragments, output_pdf)
+    return len(project_paths)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Render many zither projects into one songbook PDF.")
+    parser.add_argument("sources", nargs="+", type=Path, help="project JSON files or directories")
+    parser.add_argument("-o", "--output", default="songbook.pdf")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument("--date", type=date.fromisoformat, default=None, help="footer date, e.g. 2026-01-31")
+    parser.add_argument("--pages-per-fragment", type=int, default=PAGES_PER_FRAGMENT)
+    parser.add_argument("--backend", choices=PDF_BACKENDS, default=DEFAULT_PDF_BACKEND)
+    args = parser.parse_args(argv)
+
+    try:
+        page_count = render_songbook(
+            collect_project_paths(args.sources),
+            args.output,
+            args.workers,
+            args.date,
+            args.pages_per_fragment,
+            backend=args.backend,
+        )
+    except ValueError as exc:
+        print(f"Error: {exc}")
+        return 1
+    print(f"Rendered {page_count} pages into {args.output}.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
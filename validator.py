@@ -0,0 +1,107 @@
+import argparse
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from main import (
+    DEFAULT_INSTRUMENT_PROFILE,
+    INSTRUMENT_PROFILES,
+    _diagnostic,
+    _voice_sort_key,
+    collect_project_paths,
+    format_diagnostic,
+    validate_project,
+)
+
+# ---- Konfiguration ----
+
+# Projects per task handed to a worker process; keeps inter-process overhead low for small files.
+VALIDATION_CHUNK_SIZE = 32
+
+
+def validate_project_file(project_path):
+    # Works on the raw JSON instead of load_project_data, which silently replaces unknown instruments
+    # and turns malformed voices and events into tuples.
+    project_path = Path(project_path)
+    if not project_path.is_file():
+        return [_diagnostic(None, None, "error", "Project file does not exist.")]
+    try:
+        data = json.loads(project_path.read_text(encoding="utf-8"))
+    except (OSError, ValueError) as exc:
+        return [_diagnostic(None, None, "error", f"Cannot read project: {exc}")]
+    if not isinstance(data, dict):
+        return [_diagnostic(None, None, "error", "Project must be a JSON object.")]
+
+    instrument = data.get("instrument", DEFAULT_INSTRUMENT_PROFILE)
+    if not isinstance(instrument, str) or instrument.strip() not in INSTRUMENT_PROFILES:
+        return [_diagnostic(None, None, "error", f"Unknown instrument profile: {instrument}")]
+    instrument = instrument.strip()
+    voices = data.get("voices", {})
+    if not isinstance(voices, dict):
+        return [_diagnostic(None, None, "error", "Voices must be a JSON object of voice id to event list.")]
+
+    diagnostics = []
+    voice_melodies = {}
+    for voice_id in sorted(voices.keys(), key=_voice_sort_key):
+        events = voices[voice_id]
+        if not isinstance(events, list):
+            diagnostics.append(_diagnostic(voice_id, None, "error", f"Voice must be a list of events: {events!r}"))
+            continue
+        # Non-list events are passed through unchanged so validate_project reports each one.
+        voice_melodies[voice_id] = [tuple(event) if isinstance(event, list) else event for event in events]
+    return diagnostics + validate_project(voice_melodies, instrument)
+
+
+def validate_projects(project_paths, workers=None):
+    # Returns {path: diagnostics} in the order of project_paths.
+    project_paths = [str(path) for path in project_paths]
+    workers = min(workers or os.cpu_count() or 1, max(len(project_paths) // VALIDATION_CHUNK_SIZE, 1))
+    if workers <= 1:
+        results = [validate_project_file(path) for path in project_paths]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(validate_project_file, project_paths, chunksize=VALIDATION_CHUNK_SIZE))
+    return dict(zip(project_paths, results))
+
+
+def summarize(results):
+    summary = {"projects": len(results), "invalid_projects": 0, "errors": 0, "warnings": 0}
+    for diagnostics in results.values():
+        errors = sum(1 for diagnostic in diagnostics if diagnostic["severity"] == "error")
+        summary["errors"] += errors
+        summary["warnings"] += len(diagnostics) - errors
+        if errors:
+            summary["invalid_projects"] += 1
+    return summary
+
+
+def invalid_projects(results):
+    return [path for path, diagnostics in results.items() if any(d["severity"] == "error" for d in diagnostics)]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Validate zither projects without rendering them.")
+    parser.add_argument("sources", nargs="+", type=Path, help="project JSON files or directories")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument("--errors-only", action="store_true", help="do not list warnings")
+    args = parser.parse_args(argv)
+
+    results = validate_projects(collect_project_paths(args.sources), args.workers)
+
+    for path, diagnostics in results.items():
+        for diagnostic in diagnostics:
+            if args.errors_only and diagnostic["severity"] != "error":
+                continue
+            print(f"{path}: {format_diagnostic(diagnostic)}")
+    summary = summarize(results)
+    print(
+        f"{summary['projects']} projects checked, {summary['invalid_projects']} invalid, "
+        f"{summary['errors']} errors, {summary['warnings']} warnings."
+    )
+    return 1 if summary["errors"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())